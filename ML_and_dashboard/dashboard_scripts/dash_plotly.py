@@ -1,10 +1,6 @@
 # Importing dependencie
 # ----------------------------------------------------------------
 
-# * Analysis & Manipulation libraries
-import pandas as pd 
-import numpy as np
-
 # * Dashboard creation libraries
 import plotly.express as px 
 from dash import Dash, html, dcc
@@ -16,36 +12,25 @@ import dash_bootstrap_components as dbc
 # * Flask Dependencies
 from flask import Flask, redirect, session, url_for
 
+# * Shared dashboard modules (Webpages/flask_apps)
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "Webpages" / "flask_apps"))
+from dashboard_data import DashboardDataset
+from dashboard_cube import FEATURE_OPTIONS
 
-# Loading the dataset
-path = "/Users/galbeeir/Desktop/git/Project 4 - Fradulent Transactions/fraudulent_transactions/Webpages/flask_apps/processed_data.csv"
-
-sample_df = pd.read_csv(path, parse_dates=["trans_date_trans_time", "dob"],infer_datetime_format=True)
-
-columns_to_drop = ["cc_num", "unix_time", "zip"]
-sample_df = sample_df.drop(columns_to_drop, axis=1)
-
-# Formatting category & merchant
-sample_df['merchant'] = sample_df['merchant'].str.replace("fraud_", "")
-sample_df['category'] = sample_df['category'].str.replace("_", " ")
 
-# Calculating the age of the person at the time of the transaction
-sample_df['age'] = (sample_df['trans_date_trans_time'] - sample_df['dob']).apply(lambda x: x.days // 365)
+# Loading the dataset: every scored upload saved by the Flask app (Webpages/flask_apps/processed_data),
+# with age, gender, merchant and category derived by the loader shared with flask_app.py
+dataset = DashboardDataset().get()
+sample_df = dataset['data']
 
-# Dropping the dob column
-sample_df = sample_df.drop('dob', axis=1)
+# Amount of transactions and the percentage of fraudulent transactions relative to non-fraudulent transactions
+total_transactios_formatted = dataset['kpis']['total_transactions']
+percentage_fraudulent_formatted = dataset['kpis']['percentage_fraudulent']
 
-# Modifying the gender column
-sample_df['gender'] = sample_df['gender'].str.replace("M", "Male")
-sample_df['gender'] = sample_df['gender'].str.replace("F", "Female")
-
-# Amount of transactions in the dataset
-total_transactios = sample_df['trans_num'].count()
-total_transactios_formatted = str(total_transactios)[:3] +"," +str(total_transactios)[3:]
-
-# The percentage of fraudulent transactions relative to non-fraudulent transactions
-percentage_fraudulent = round((sample_df.query("is_fraud == 1")['is_fraud'].count()) / (sample_df.query("is_fraud == 0")['is_fraud'].count()), 3)
-percentage_fraudulent_formatted = f"%{percentage_fraudulent}"
+# Precomputed transaction counts the dashboard callback slices
+cube = dataset['cube']
 
 # Importing external stylesheets
 dbc_css = "https://cdn.jsdelivr.net/gh/AnnMarieW/dash-bootstrap-templates/dbc.min.css"
@@ -95,7 +80,7 @@ app.layout = html.Div(
         dbc.Col(dbc.Card([
             dcc.Dropdown(
                 id="features",
-                options=sample_df.select_dtypes(include='object').columns[:-1],
+                options=FEATURE_OPTIONS,
                 value= "category",
                 className='dbc'
             ),
@@ -135,18 +120,10 @@ def dashboard(filter_item, feature, sort_order):
     # * Create a dynamic header
     header = f"{filter_label} Dashboard"
 
-    # * Filter the datset based on the selected filter item
-    if filter_item == 1:
-        df = sample_df.query("is_fraud == 1")
-    elif filter_item == 0:
-        df = sample_df.query("is_fraud == 0")
-    else:
-        df = sample_df
-
     # * Plot the bar chart 
     bar = (
         px.bar(
-        df.groupby(feature, as_index=False)["trans_num"].count().sort_values(by="trans_num", ascending=sort_order),
+        cube.feature(filter_item, feature).sort_values(by="trans_num", ascending=sort_order),
         x="trans_num",
         y=feature,
         color="trans_num",
@@ -170,7 +147,7 @@ def dashboard(filter_item, feature, sort_order):
     # * Plot the histogram
     histogram = (
     px.histogram(
-        df.groupby("age", as_index=False)['trans_num'].count(),
+        cube.age(filter_item),
         x="age",
         y="trans_num",
         title=f"Destribution of Transactions by Age ({filter_label})"
@@ -190,7 +167,7 @@ def dashboard(filter_item, feature, sort_order):
     # * Plot the pie chart
     pie = (
         px.pie(
-        df.groupby("gender", as_index=False)["trans_num"].count(),
+        cube.gender(filter_item),
         values="trans_num",
         names="gender",
         hole=0.46,
@@ -212,7 +189,7 @@ def dashboard(filter_item, feature, sort_order):
     # * Plot the scatter_mapbox
     map_scatter = (
         px.scatter_mapbox(
-        df.groupby(["city", "lat", "long"])["trans_num"].count().reset_index(),
+        cube.map(filter_item),
         lat="lat",
         lon="long",
         size="trans_num",
@@ -0,0 +1,120 @@
+# IMPORT DEPENDENCIES
+# ----------------------------------------------------------------
+# * Directory and serialization libraries
+import io
+import json
+
+# * Analysis and manipulation libraries
+import pandas as pd
+import numpy as np
+################################################################################
+
+
+### BATCH FORMATS FOR THE SCORING API ###
+################################################################################
+# * Content types accepted (and answered in the same format) by /api/v1/score
+JSON = 'application/json'
+CSV = 'text/csv'
+ARROW = 'application/vnd.apache.arrow.stream'
+PARQUET = 'application/vnd.apache.parquet'
+
+CONTENT_TYPES = {
+    'application/json': JSON,
+    'text/csv': CSV,
+    'application/vnd.apache.arrow.stream': ARROW,
+    'application/vnd.apache.arrow.file': ARROW,
+    'application/vnd.apache.parquet': PARQUET,
+    'application/x-parquet': PARQUET,
+}
+
+# * Arrow and Parquet bodies are handed to the WSGI server in blocks of this many bytes
+BODY_BLOCK_SIZE = 64 * 1024
+
+
+class UnsupportedFormat(ValueError):
+    pass
+
+
+def batch_format(content_type):
+    """Map a request Content-Type (parameters ignored) to one of the supported formats."""
+    mimetype = (content_type or '').split(';')[0].strip().lower()
+    if mimetype not in CONTENT_TYPES:
+        raise UnsupportedFormat(f"Unsupported content type '{mimetype}', use one of {sorted(CONTENT_TYPES)}")
+    return CONTENT_TYPES[mimetype]
+
+
+def read_batch(body, fmt):
+    """Parse a request body into a DataFrame of transactions."""
+    if fmt == JSON:
+        # * Either a list of records or {"records": [...]}
+        records = json.loads(body) if body else []
+        if isinstance(records, dict):
+            records = records.get('records', [])
+        return pd.DataFrame.from_records(records)
+
+    if fmt == CSV:
+        return pd.read_csv(io.BytesIO(body))
+
+    import pyarrow as pa
+
+    if fmt == ARROW:
+        # * Read the IPC stream (or file) straight from the request buffer
+        buffer = pa.py_buffer(body)
+        try:
+            table = pa.ipc.open_stream(buffer).read_all()
+        except pa.ArrowInvalid:
+            table = pa.ipc.open_file(buffer).read_all()
+        return table.to_pandas()
+
+    import pyarrow.parquet as pq
+    return pq.read_table(pa.BufferReader(body)).to_pandas()
+
+
+def write_batch(result_df, fmt):
+    """Serialize the scored batch in the request's format, returning (body, mimetype).
+
+    JSON and CSV come back as text; Arrow and Parquet as the pa.Buffer the writer filled,
+    without copying it into bytes (see iter_body).
+    """
+    if fmt == JSON:
+        return result_df.to_json(orient='records'), JSON
+
+    if fmt == CSV:
+        return result_df.to_csv(index=False), CSV
+
+    import pyarrow as pa
+
+    # * Numeric result columns are wrapped without copying their NumPy buffers
+    table = pa.Table.from_pandas(result_df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+
+    if fmt == ARROW:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue(), ARROW
+
+    import pyarrow.parquet as pq
+    pq.write_table(table, sink)
+    return sink.getvalue(), PARQUET
+
+
+def iter_body(body, block_size=BODY_BLOCK_SIZE):
+    """Yield a pa.Buffer body from write_batch as bytes blocks.
+
+    WSGI servers only take bytes; converting block by block reads the buffer through a
+    memoryview, so the whole body is never held twice.
+    """
+    view = memoryview(body)
+    for start in range(0, len(view), block_size):
+        yield bytes(view[start:start + block_size])
+
+
+def scored_batch(sample_df, is_fraud, fraud_probability):
+    """Predictions and probabilities keyed by 'trans_num' when the batch carries it."""
+    result_df = pd.DataFrame({
+        'is_fraud': np.asarray(is_fraud, dtype=np.int8),
+        'fraud_probability': np.asarray(fraud_probability, dtype=np.float64),
+    })
+    if 'trans_num' in sample_df.columns:
+        result_df.insert(0, 'trans_num', sample_df['trans_num'].to_numpy())
+    return result_df
@@ -0,0 +1,33 @@
+# Throughput of the parallel batch scorer for 1, 2, 4, ... worker processes (up to the core count).
+#   python benchmarks/bench_batch_scoring.py [rows]
+# ----------------------------------------------------------------
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from score_batch import fit_on_input, score_batch
+from synthetic import make_transactions
+
+NUM_ROWS = 1_800_000
+
+
+if __name__ == '__main__':
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_ROWS
+    cores = os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = Path(tmp) / 'transactions.csv'
+        make_transactions(num_rows).to_csv(input_path, index=False)
+        preprocessor = fit_on_input(input_path)
+        print(f"{num_rows} rows, {cores} cores")
+
+        baseline = None
+        workers = 1
+        while workers <= cores:
+            report = score_batch(input_path, Path(tmp) / 'scored.parquet', workers=workers, preprocessor=preprocessor)
+            baseline = baseline or report['rows_per_second']
+            print(f"{workers:>3} workers {report['seconds']:>8.2f} s {report['rows_per_second']:>12,.0f} rows/s "
+                  f"{report['rows_per_second'] / baseline:>6.2f}x")
+            workers *= 2
@@ -0,0 +1,30 @@
+# Cold start of flask_app.py: import time (from -X importtime) and which heavy libraries it loaded.
+#   python benchmarks/bench_cold_start.py [FRAUD_DATA_DIR]
+# ----------------------------------------------------------------
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+# * Libraries the scoring routes should not need at startup
+HEAVY = ['plotly', 'dash', 'dash_bootstrap_components', 'dash_bootstrap_templates', 'sklearn', 'pyarrow']
+
+CHECK = "import sys, flask_app; print(' '.join(name for name in %r if name in sys.modules))" % HEAVY
+
+
+if __name__ == '__main__':
+    env = dict(os.environ, PYTHONPATH=str(APP_DIR))
+    if len(sys.argv) > 1:
+        env['FRAUD_DATA_DIR'] = sys.argv[1]
+    # * Keep the card state the import creates out of the repo
+    state_dir = tempfile.TemporaryDirectory()
+    env['FRAUD_FEATURE_STORE'] = str(Path(state_dir.name) / 'card_features.sqlite')
+
+    for run in range(3):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHECK], env=env, cwd=APP_DIR, capture_output=True, text=True)
+        # * The last -X importtime line is flask_app itself: "import time: self | cumulative | name"
+        cumulative = [line for line in result.stderr.splitlines() if line.endswith('| flask_app')][-1].split('|')[1]
+        print(f"run {run + 1}: {int(cumulative) / 1e6:.2f} s, loaded: {result.stdout.strip() or 'none of ' + ', '.join(HEAVY)}")
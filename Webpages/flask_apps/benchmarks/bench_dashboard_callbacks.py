@@ -0,0 +1,72 @@
+# Server CPU time and response bytes per dashboard control, single callback vs per-figure callbacks.
+#   python benchmarks/bench_dashboard_callbacks.py [rows]
+# ----------------------------------------------------------------
+import json
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import plotly
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dashboard_cube import AggregateCube
+from dashboard_figures import age_histogram, bar_chart, gender_pie, transactions_map
+from synthetic import make_transactions
+
+
+def dashboard_frame(num_rows):
+    # * Synthetic transactions shaped like the dashboard's sample_df
+    sample_df = make_transactions(num_rows)
+    sample_df['is_fraud'] = (sample_df.index % 190 == 0).astype(int)
+    sample_df['trans_date_trans_time'] = pd.to_datetime(sample_df['trans_date_trans_time'])
+    sample_df['age'] = (sample_df['trans_date_trans_time'] - pd.to_datetime(sample_df['dob'])).dt.days // 365
+    sample_df['gender'] = sample_df['gender'].map({'M': 'Male', 'F': 'Female'})
+    sample_df['merchant'] = sample_df['merchant'].str.replace("fraud_", "")
+    return sample_df
+
+
+def measure(builders):
+    # * CPU seconds on the server and JSON bytes sent to the browser
+    start = time.process_time()
+    outputs = [build() for build in builders]
+    cpu = time.process_time() - start
+    payload = sum(len(json.dumps(output, cls=plotly.utils.PlotlyJSONEncoder)) for output in outputs)
+    return cpu, payload
+
+
+if __name__ == '__main__':
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    cube = AggregateCube(dashboard_frame(num_rows), features=["category", "state"])
+    filter_item, feature, sort_order = -1, "state", True
+
+    # * Before: one callback rebuilt the header and all five figures for any control
+    everything = [
+        lambda: "All Dashboard",
+        lambda: bar_chart(cube, filter_item, feature, sort_order),
+        lambda: age_histogram(cube, filter_item),
+        lambda: gender_pie(cube, filter_item),
+        lambda: transactions_map(cube, filter_item),
+    ]
+
+    # * After: only the callbacks whose inputs changed run on the server
+    per_control = {
+        'dataFilter': [
+            lambda: "All Dashboard",
+            lambda: bar_chart(cube, filter_item, feature),
+            lambda: age_histogram(cube, filter_item),
+            lambda: gender_pie(cube, filter_item),
+            lambda: transactions_map(cube, filter_item),
+        ],
+        'features': [lambda: bar_chart(cube, filter_item, feature)],
+        'asc-desc': [],
+    }
+
+    # * Warm up plotly's lazy imports and templates
+    measure(everything)
+
+    print(f"{'control':<12} {'before (ms)':>12} {'after (ms)':>11} {'before (KB)':>12} {'after (KB)':>11}")
+    for control, builders in per_control.items():
+        before_cpu, before_bytes = measure(everything)
+        after_cpu, after_bytes = measure(builders)
+        print(f"{control:<12} {before_cpu * 1000:>12.1f} {after_cpu * 1000:>11.1f} {before_bytes / 1024:>12.1f} {after_bytes / 1024:>11.1f}")
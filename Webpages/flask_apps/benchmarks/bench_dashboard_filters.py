@@ -0,0 +1,87 @@
+# Date-range, state and category filters: a full query() scan against the cube's row index, as the data grows.
+#   python benchmarks/bench_dashboard_filters.py [rows,rows,...]
+# ----------------------------------------------------------------
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dashboard_cube import AggregateCube
+from synthetic import CATEGORIES, STATES
+
+SIZES = (250_000, 1_000_000, 4_000_000)
+
+# * (label, start date, end date, states, categories), as the dashboard controls send them
+SELECTIONS = [
+    ('one week', '2020-03-02', '2020-03-08', None, None),
+    ('one state', None, None, ['CA'], None),
+    ('month x state x category', '2019-07-01', '2019-07-31', ['NY'], ['travel']),
+]
+
+
+def dashboard_rows(num_rows, seed=2023):
+    # * Only the columns the filters and the cube's tables touch, in time order like DashboardDataset keeps them
+    rng = np.random.default_rng(seed)
+    city = rng.integers(0, 890, num_rows)
+    start = pd.Timestamp('2019-01-01').value // 10**9
+    stop = pd.Timestamp('2020-12-31 23:59:59').value // 10**9
+    return pd.DataFrame({
+        'trans_date_trans_time': np.sort(rng.integers(start, stop, num_rows)).astype('datetime64[s]'),
+        'state': pd.Categorical.from_codes(rng.integers(0, len(STATES), num_rows), categories=STATES),
+        'category': pd.Categorical.from_codes(rng.integers(0, len(CATEGORIES), num_rows), categories=CATEGORIES),
+        'age': rng.integers(18, 90, num_rows).astype(np.int16),
+        'gender': pd.Categorical.from_codes(rng.integers(0, 2, num_rows), categories=['Female', 'Male']),
+        'city': pd.Categorical.from_codes(city, categories=[f'City{i}' for i in range(890)]),
+        'lat': rng.uniform(25.0, 48.0, 890).astype(np.float32)[city],
+        'long': rng.uniform(-123.0, -70.0, 890).astype(np.float32)[city],
+        'trans_num': np.arange(num_rows),
+        'is_fraud': (rng.random(num_rows) < 0.005).astype(np.int64),
+    })
+
+
+def query_scan(sample_df, start_date, end_date, states, categories):
+    conditions = []
+    if start_date:
+        conditions.append(f"trans_date_trans_time >= '{start_date}'")
+    if end_date:
+        conditions.append(f"trans_date_trans_time < '{np.datetime64(end_date, 'D') + 1}'")
+    if states:
+        conditions.append(f"state in {states!r}")
+    if categories:
+        conditions.append(f"category in {categories!r}")
+    selected = sample_df.query(' and '.join(conditions))
+    return selected.groupby('age', as_index=False, observed=True)['trans_num'].count()
+
+
+def indexed(cube, start_date, end_date, states, categories):
+    # * A fresh selection every time, so the cube's cache of recent selections is not measured
+    cube._selections.clear()
+    return cube.select(start_date, end_date, states, categories).age(-1)
+
+
+def best_ms(run, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+if __name__ == '__main__':
+    sizes = [int(size) for size in sys.argv[1].split(',')] if len(sys.argv) > 1 else SIZES
+    print(f"{'rows':>10} {'selection':<26} {'selected':>9} {'query() (ms)':>13} {'index (ms)':>11} {'speedup':>8}")
+    for num_rows in sizes:
+        sample_df = dashboard_rows(num_rows)
+        cube = AggregateCube(sample_df, features=())
+        # * Build the state and category row lists once, as the first filtered request would
+        cube.index.values('state'), cube.index.values('category')
+        for label, *selected in SELECTIONS:
+            expected = query_scan(sample_df, *selected)
+            assert indexed(cube, *selected).equals(expected)
+            scan = best_ms(lambda: query_scan(sample_df, *selected))
+            index = best_ms(lambda: indexed(cube, *selected))
+            print(f"{num_rows:>10,} {label:<26} {int(expected['trans_num'].sum()):>9,} {scan:>13.1f} {index:>11.2f} {scan / index:>7.0f}x")
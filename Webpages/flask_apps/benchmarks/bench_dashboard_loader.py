@@ -0,0 +1,52 @@
+# Benchmark the dashboard loader: row-wise age and string cleanup against the shared vectorized loader.
+#   python benchmarks/bench_dashboard_loader.py [rows]
+# ----------------------------------------------------------------
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dashboard_data import dashboard_frame
+from processed_data import DASHBOARD_COLUMNS, read_processed, write_processed
+from synthetic import make_transactions
+
+NUM_ROWS = 1_800_000
+
+
+def rowwise_frame(sample_df):
+    # * What flask_app.py and dash_plotly.py both did before
+    sample_df['merchant'] = sample_df['merchant'].str.replace("fraud_", "")
+    sample_df['category'] = sample_df['category'].str.replace("_", " ")
+    sample_df['age'] = (sample_df['trans_date_trans_time'] - sample_df['dob']).apply(lambda x: x.days // 365)
+    sample_df = sample_df.drop('dob', axis=1)
+    sample_df['gender'] = sample_df['gender'].str.replace("M", "Male")
+    sample_df['gender'] = sample_df['gender'].str.replace("F", "Female")
+    return sample_df
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_ROWS
+    with tempfile.TemporaryDirectory() as tmp:
+        sample_df = make_transactions(num_rows, num_cards=max(num_rows // 200, 10))
+        sample_df['is_fraud'] = (sample_df.index % 200 == 0).astype(int)
+        csv_path, parquet_path = Path(tmp) / 'processed_data.csv', Path(tmp) / 'processed_data.parquet'
+        sample_df.to_csv(csv_path, index=False)
+        write_processed(sample_df, parquet_path)
+
+        print(f"{num_rows} rows")
+        print(f"{'source':>8} {'read (s)':>10} {'row-wise (s)':>14} {'vectorized (s)':>16} {'speedup':>9}")
+        for source, path in (('csv', csv_path), ('parquet', parquet_path)):
+            processed_df, read_time = timed(read_processed, path, DASHBOARD_COLUMNS)
+            expected, rowwise_time = timed(rowwise_frame, processed_df.copy())
+            result, vector_time = timed(dashboard_frame, processed_df.copy())
+
+            for column in ('merchant', 'category', 'gender', 'age'):
+                assert (result[column].astype(object).to_numpy() == expected[column].astype(object).to_numpy()).all(), column
+            print(f"{source:>8} {read_time:>10.2f} {rowwise_time:>14.2f} {vector_time:>16.3f} {rowwise_time / vector_time:>8.0f}x")
@@ -0,0 +1,52 @@
+# Map figure payload and build time: one marker per city against the binned density layer.
+#   python benchmarks/bench_density_map.py [rows] [locations]
+# ----------------------------------------------------------------
+import json
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import plotly
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dashboard_cube import AggregateCube
+from dashboard_data import dashboard_frame
+from dashboard_figures import density_map, map_grid, transactions_map
+from synthetic import make_transactions
+
+# * (zoom, view width in degrees) pairs, the first being the dashboard's initial view
+VIEWS = [(4.5, None), (3, None), (6, 20.0), (8, 5.0), (10, 1.2), (12, 0.3)]
+
+
+def measure(build):
+    start = time.perf_counter()
+    figure = build()
+    elapsed = time.perf_counter() - start
+    return elapsed, len(json.dumps(figure, cls=plotly.utils.PlotlyJSONEncoder))
+
+
+if __name__ == '__main__':
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_800_000
+    num_locations = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+
+    # * Every card holder lives somewhere else, so the city map has one marker per card
+    sample_df = make_transactions(num_rows, num_cards=num_locations)
+    sample_df['is_fraud'] = (sample_df.index % 200 == 0).astype(int)
+    sample_df['trans_date_trans_time'] = pd.to_datetime(sample_df['trans_date_trans_time'])
+    sample_df['dob'] = pd.to_datetime(sample_df['dob'])
+
+    start = time.perf_counter()
+    cube = AggregateCube(dashboard_frame(sample_df))
+    print(f"{num_rows} rows, {num_locations} locations; cube built in {time.perf_counter() - start:.2f} s")
+
+    # * Warm up plotly's lazy imports and templates
+    measure(lambda: density_map(cube, -1, 0))
+
+    elapsed, payload = measure(lambda: transactions_map(cube, -1))
+    print(f"{'cities':<16} {'':>6} {elapsed * 1000:>10.1f} ms {payload / 1024:>10.1f} KB")
+    for zoom, width in VIEWS:
+        bounds = None if width is None else (38 - width / 4, 38 + width / 4, -100 - width / 2, -100 + width / 2)
+        level, window = map_grid(cube, -1, zoom, bounds)
+        elapsed, payload = measure(lambda: density_map(cube, -1, level, window, zoom))
+        print(f"{'density zoom ' + str(zoom):<16} {'L' + str(level):>6} {elapsed * 1000:>10.1f} ms {payload / 1024:>10.1f} KB")
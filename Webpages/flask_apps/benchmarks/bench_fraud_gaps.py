@@ -0,0 +1,56 @@
+# Benchmark the vectorized 7-day gap stage against the original row loop.
+#   python benchmarks/bench_fraud_gaps.py [rows ...]
+# ----------------------------------------------------------------
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from preprocessing import flag_fraud_gaps
+from synthetic import make_transactions
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def legacy_flag_fraud_gaps(fraud_df):
+    # * The loop `upload()` used before `flag_fraud_gaps`, kept as the reference implementation
+    fraud_df['is_fraud'] = 0
+    fraud_df.loc[0, 'is_fraud'] = 1
+    for i in range(1, len(fraud_df)):
+        time_difference = fraud_df['trans_date_trans_time'].iloc[i] - fraud_df['trans_date_trans_time'].iloc[i - 1]
+        if time_difference >= timedelta(days=7):
+            fraud_df.loc[i, 'is_fraud'] = 1
+    return fraud_df
+
+
+def sorted_frame(num_rows, num_cards=1000):
+    fraud_df = make_transactions(num_rows, num_cards=num_cards)[['trans_date_trans_time', 'amt']]
+    fraud_df['trans_date_trans_time'] = pd.to_datetime(fraud_df['trans_date_trans_time'], format='%Y-%m-%d %H:%M:%S')
+    return fraud_df.sort_values(by='trans_date_trans_time', ascending=True)
+
+
+def timed(func, fraud_df):
+    start = time.perf_counter()
+    result = func(fraud_df.copy())
+    return time.perf_counter() - start, result
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+
+    # * Sparse uploads actually contain 7-day gaps, so check equality on those too
+    sparse = sorted_frame(200)
+    sparse = sparse.iloc[::4]
+    sparse.index = pd.RangeIndex(len(sparse))[::-1]
+    pd.testing.assert_frame_equal(legacy_flag_fraud_gaps(sparse.copy()), flag_fraud_gaps(sparse.copy()))
+
+    print(f"{'rows':>10} {'loop (s)':>12} {'vectorized (s)':>16} {'speedup':>10}")
+    for num_rows in sizes:
+        fraud_df = sorted_frame(num_rows)
+        loop_time, expected = timed(legacy_flag_fraud_gaps, fraud_df)
+        vector_time, result = timed(flag_fraud_gaps, fraud_df)
+        pd.testing.assert_frame_equal(expected, result)
+        print(f"{num_rows:>10} {loop_time:>12.3f} {vector_time:>16.4f} {loop_time / vector_time:>9.0f}x")
@@ -0,0 +1,42 @@
+# Benchmark the vectorized haversine geo features against a row-wise apply.
+#   python benchmarks/bench_geo_features.py [rows ...]
+# ----------------------------------------------------------------
+import math
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from preprocessing import EARTH_RADIUS_KM, geo_features
+from synthetic import make_transactions
+
+SIZES = [100_000, 1_000_000]
+
+
+def row_haversine_km(row):
+    # * What a per-row implementation looks like, for comparison only
+    lat1, long1, lat2, long2 = map(math.radians, (row['lat'], row['long'], row['merch_lat'], row['merch_long']))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((long2 - long1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+
+    print(f"{'rows':>10} {'apply (s)':>12} {'vectorized (s)':>16} {'speedup':>10}")
+    for num_rows in sizes:
+        sample_df = make_transactions(num_rows, num_cards=max(num_rows // 200, 10))
+
+        start = time.perf_counter()
+        expected = sample_df.apply(row_haversine_km, axis=1)
+        apply_time = time.perf_counter() - start
+
+        # * The vectorized stage also computes the per-card previous-merchant distance
+        start = time.perf_counter()
+        features = geo_features(sample_df)
+        vector_time = time.perf_counter() - start
+
+        assert np.allclose(features['merch_distance_km'].to_numpy(), expected.to_numpy())
+        print(f"{num_rows:>10} {apply_time:>12.3f} {vector_time:>16.3f} {apply_time / vector_time:>9.0f}x")
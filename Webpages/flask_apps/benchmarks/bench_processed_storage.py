@@ -0,0 +1,59 @@
+# Benchmark loading the dashboard data from the processed CSV against the typed Parquet file.
+#   python benchmarks/bench_processed_storage.py [rows]
+# ----------------------------------------------------------------
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from processed_data import DASHBOARD_COLUMNS, read_processed, write_processed
+from synthetic import make_transactions
+
+NUM_ROWS = 1_800_000
+
+
+def peak_rss_mb():
+    # * VmHWM (Linux) is reset by exec, unlike ru_maxrss which a child inherits from this script
+    for line in Path('/proc/self/status').read_text().splitlines():
+        if line.startswith('VmHWM:'):
+            return int(line.split()[1]) / 2**10
+
+
+def load(kind, path):
+    # * Peak RSS is per process, so each load runs in a fresh interpreter (see __main__)
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if kind == 'csv':
+        # * What the dashboard did before: every column, dates parsed afterwards
+        sample_df = pd.read_csv(path)
+        sample_df['trans_date_trans_time'] = pd.to_datetime(sample_df['trans_date_trans_time'])
+        sample_df['dob'] = pd.to_datetime(sample_df['dob'])
+    else:
+        sample_df = read_processed(path, columns=DASHBOARD_COLUMNS)
+    elapsed = time.perf_counter() - start
+    peak = peak_rss_mb()
+    frame_mb = sample_df.memory_usage(deep=True).sum() / 2**20
+    print(f"{kind:>8} {elapsed:>10.2f} {peak - baseline:>14.0f} {frame_mb:>12.0f}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and sys.argv[1] == '--load':
+        load(sys.argv[2], sys.argv[3])
+        sys.exit()
+
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_ROWS
+    with tempfile.TemporaryDirectory() as tmp:
+        sample_df = make_transactions(num_rows, num_cards=max(num_rows // 200, 10))
+        sample_df['is_fraud'] = (sample_df.index % 200 == 0).astype(int)
+        csv_path, parquet_path = Path(tmp) / 'processed_data.csv', Path(tmp) / 'processed_data.parquet'
+        sample_df.to_csv(csv_path, index=False)
+        write_processed(sample_df, parquet_path)
+
+        print(f"{num_rows} rows: csv {csv_path.stat().st_size / 2**20:.0f} MB, parquet {parquet_path.stat().st_size / 2**20:.0f} MB")
+        print(f"{'format':>8} {'load (s)':>10} {'peak RSS (MB)':>14} {'frame (MB)':>12}")
+        for kind, path in (('csv', csv_path), ('parquet', parquet_path)):
+            subprocess.run([sys.executable, __file__, '--load', kind, str(path)], check=True)
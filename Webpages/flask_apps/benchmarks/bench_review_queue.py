@@ -0,0 +1,59 @@
+# Ranking scored transactions for a review queue: a full sort against the partial sort in top_k_risk.
+#   python benchmarks/bench_review_queue.py [rows] [k]
+# ----------------------------------------------------------------
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scoring import top_k_risk
+
+NUM_ROWS = 1_000_000
+K = 1_000
+
+
+def fraud_probabilities(num_rows, seed=2023):
+    # * Like model.pkl's: a decision tree gives every row one of a few hundred leaf probabilities,
+    # * mostly near zero, so many rows tie
+    rng = np.random.default_rng(seed)
+    leaves = np.sort(rng.beta(0.3, 4.0, 300))
+    return leaves[rng.integers(0, len(leaves), num_rows)]
+
+
+def full_sort(probabilities, k):
+    # * A stable sort of every row by descending probability, then the first k
+    return np.argsort(-probabilities, kind='stable')[:k]
+
+
+def measure(rank, probabilities, k, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rank(probabilities, k)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    rank(probabilities, k)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(times) * 1000, peak / 2**20
+
+
+if __name__ == '__main__':
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_ROWS
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else K
+
+    probabilities = fraud_probabilities(num_rows)
+    assert (top_k_risk(probabilities, k) == full_sort(probabilities, k)).all()
+
+    print(f"top {k:,} of {num_rows:,} scored rows")
+    print(f"{'ranking':<34} {'best (ms)':>10} {'peak memory (MB)':>17}")
+    for label, rank in [
+        ('full sort (np.argsort)', full_sort),
+        ('argpartition, ties unordered', lambda p, k: np.argpartition(-p, k - 1)[:k]),
+        ('top_k_risk (partial sort)', top_k_risk),
+    ]:
+        milliseconds, peak = measure(rank, probabilities, k)
+        print(f"{label:<34} {milliseconds:>10.1f} {peak:>17.1f}")
@@ -0,0 +1,53 @@
+# Latency of scoring one transaction: DataFrame + sklearn predict vs dict preprocessing + compiled tree.
+#   python benchmarks/bench_single_transaction.py [iterations]
+# ----------------------------------------------------------------
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from model_registry import ModelRegistry
+from preprocessing import fit_preprocessor, transform_features
+from synthetic import make_transactions
+from tree_evaluator import record_scorer
+
+
+def percentiles(func, records, iterations):
+    timings = np.empty(iterations)
+    for i in range(iterations):
+        record = records[i % len(records)]
+        start = time.perf_counter()
+        func(record)
+        timings[i] = time.perf_counter() - start
+    return np.percentile(timings, [50, 99]) * 1e6
+
+
+if __name__ == '__main__':
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+
+    model = ModelRegistry().get()
+    train_df = make_transactions(50_000, seed=1)
+    train_df['is_fraud'] = (np.random.default_rng(1).random(len(train_df)) < 0.01).astype(int)
+    preprocessor = fit_preprocessor(train_df)
+
+    sample_df = make_transactions(2_000, seed=2)
+    records = sample_df.to_dict(orient='records')
+    scorer = record_scorer(model, preprocessor)
+
+    # * The compiled evaluator must agree with sklearn on every record
+    probabilities = model.predict_proba(transform_features(sample_df, preprocessor))[:, 1]
+    predictions = model.predict(transform_features(sample_df, preprocessor))
+    compiled = [scorer(record) for record in records]
+    assert [prediction for prediction, _ in compiled] == predictions.tolist()
+    assert np.allclose([probability for _, probability in compiled], probabilities, rtol=0, atol=1e-12)
+
+    def predict_path(record):
+        return model.predict(transform_features(pd.DataFrame([record]), preprocessor))
+
+    print(f"{'path':<30} {'p50 (us)':>10} {'p99 (us)':>10}")
+    for name, func in [('DataFrame + sklearn predict', predict_path), ('dict + compiled tree', scorer)]:
+        p50, p99 = percentiles(func, records, iterations)
+        print(f"{name:<30} {p50:>10.1f} {p99:>10.1f}")
@@ -0,0 +1,71 @@
+# Memory of N dashboard worker processes: private pandas frames against the shared memory-mapped store.
+#   python benchmarks/bench_transaction_store.py [rows] [workers]
+# ----------------------------------------------------------------
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from processed_data import write_processed
+from synthetic import make_transactions
+
+NUM_ROWS = 1_800_000
+
+# * Each worker loads the dashboard dataset, reports when it is ready and then waits to be measured
+WORKER = """
+import sys
+sys.path.insert(0, {app_dir!r})
+from dashboard_data import DashboardDataset
+dataset = DashboardDataset({data_dir!r}, features=['category'], use_store={use_store}).get()
+print(len(dataset['data']), flush=True)
+sys.stdin.readline()
+"""
+
+
+def memory_mb(pid):
+    # * Pss splits shared pages between the processes mapping them; Private is what each one holds alone
+    fields = {}
+    for line in Path(f'/proc/{pid}/smaps_rollup').read_text().splitlines()[1:]:
+        name, value = line.split(':')
+        fields[name] = int(value.split()[0]) / 2**10
+    return fields['Rss'], fields['Pss'], fields['Private_Clean'] + fields['Private_Dirty']
+
+
+def run_workers(data_dir, use_store, num_workers):
+    code = WORKER.format(app_dir=str(Path(__file__).resolve().parent.parent), data_dir=str(data_dir), use_store=use_store)
+    # * The first worker builds the store (if any); the others start once it exists, like a warm restart
+    start = time.perf_counter()
+    workers = [subprocess.Popen([sys.executable, '-c', code], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)]
+    workers[0].stdout.readline()
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    workers += [subprocess.Popen([sys.executable, '-c', code], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+                for _ in range(num_workers - 1)]
+    for worker in workers[1:]:
+        worker.stdout.readline()
+    others = time.perf_counter() - start
+
+    usage = [memory_mb(worker.pid) for worker in workers]
+    for worker in workers:
+        worker.communicate('\n')
+    return first, others, usage
+
+
+if __name__ == '__main__':
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_ROWS
+    num_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        sample_df = make_transactions(num_rows, num_cards=max(num_rows // 200, 10))
+        sample_df['is_fraud'] = (sample_df.index % 200 == 0).astype(int)
+        write_processed(sample_df, Path(data_dir) / 'part.parquet')
+        del sample_df
+
+        print(f"{num_rows} rows, {num_workers} workers")
+        print(f"{'':<8} {'first (s)':>10} {'others (s)':>11} {'RSS (MB)':>10} {'PSS (MB)':>10} {'private (MB)':>13} {'total PSS (MB)':>15}")
+        for label, use_store in (('private', False), ('store', True)):
+            first, others, usage = run_workers(data_dir, use_store, num_workers)
+            rss, pss, private = (sum(values) / len(values) for values in zip(*usage))
+            print(f"{label:<8} {first:>10.2f} {others:>11.2f} {rss:>10.0f} {pss:>10.0f} {private:>13.0f} {sum(u[1] for u in usage):>15.0f}")
@@ -0,0 +1,344 @@
+# Benchmark suite for the upload, scoring and dashboard hot paths, saved per commit for comparison.
+#   python benchmarks/suite.py [--sizes 10000,100000] [--repeat 3] [--filter upload] [--compare [RESULTS.json]]
+# Every case runs on synthetic transactions with the upload columns (see synthetic.py) at each size.
+# Results go to benchmarks/results/<time>-<commit>.json; --compare prints each case against an
+# earlier run (the latest one by default) and exits with status 1 when one got slower.
+# ----------------------------------------------------------------
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARKS_DIR.parent))
+from dashboard_cube import AggregateCube
+from dashboard_data import load_dashboard_frame
+from model_registry import ModelRegistry
+from preprocessing import fit_preprocessor, flag_fraud_gaps, geo_features, seed_fraud_labels, to_unix_columns, transform_features
+from processed_data import write_processed
+from scoring import format_output, score_csv_stream, top_k_risk
+from synthetic import make_transactions
+
+RESULTS_DIR = BENCHMARKS_DIR / 'results'
+SIZES = (10_000, 100_000)
+
+# * A case counts as slower when its best time grew by more than this fraction
+REGRESSION = 0.10
+
+
+### CASES ###
+################################################################################
+# * (name, setup): setup(data) returns (prepare, run); prepare() is untimed, run(prepared) is timed
+CASES = []
+
+
+def case(name):
+    def register(setup):
+        CASES.append((name, setup))
+        return setup
+    return register
+
+
+class Data:
+    """Inputs for one size, built on first use and shared by every case."""
+
+    def __init__(self, rows, workdir):
+        self.rows = rows
+        self.workdir = Path(workdir)
+
+    @cached_property
+    def csv(self):
+        # * Cards and merchants grow with the size, like a real history does
+        upload_df = make_transactions(self.rows, num_cards=max(self.rows // 200, 10))
+        return upload_df.to_csv(index=False).encode()
+
+    @cached_property
+    def upload_df(self):
+        return pd.read_csv(io.BytesIO(self.csv))
+
+    @cached_property
+    def preprocessor(self):
+        return fit_preprocessor(seed_fraud_labels(self.upload_df))
+
+    @cached_property
+    def model(self):
+        return ModelRegistry().get()
+
+    @cached_property
+    def features(self):
+        return transform_features(self.upload_df, self.preprocessor)
+
+    @cached_property
+    def scored_df(self):
+        scored_df = self.upload_df.copy()
+        scored_df['is_fraud'] = self.model.predict(self.features)
+        return format_output(scored_df)
+
+    @cached_property
+    def processed_path(self):
+        path = self.workdir / f'processed-{self.rows}.parquet'
+        write_processed(self.scored_df.copy(), path)
+        return path
+
+    @cached_property
+    def cube(self):
+        return AggregateCube(load_dashboard_frame(self.processed_path), features=['category', 'state'])
+
+
+@case('upload.read_csv')
+def _(data):
+    return None, lambda _: pd.read_csv(io.BytesIO(data.csv))
+
+
+@case('preprocessing.seed_fraud_labels')
+def _(data):
+    return None, lambda _: seed_fraud_labels(data.upload_df)
+
+
+@case('preprocessing.flag_fraud_gaps')
+def _(data):
+    sorted_df = data.upload_df[['trans_date_trans_time']].assign(trans_date_trans_time=pd.to_datetime(data.upload_df['trans_date_trans_time']))
+    sorted_df = sorted_df.sort_values('trans_date_trans_time').reset_index(drop=True)
+    return sorted_df.copy, flag_fraud_gaps
+
+
+@case('preprocessing.to_unix_columns')
+def _(data):
+    return lambda: data.upload_df[['trans_date_trans_time', 'dob']].copy(), to_unix_columns
+
+
+@case('preprocessing.fit_preprocessor')
+def _(data):
+    seeded = seed_fraud_labels(data.upload_df)
+    return None, lambda _: fit_preprocessor(seeded)
+
+
+@case('preprocessing.transform_features')
+def _(data):
+    return None, lambda _: transform_features(data.upload_df, data.preprocessor)
+
+
+@case('preprocessing.geo_features')
+def _(data):
+    return None, lambda _: geo_features(data.upload_df)
+
+
+@case('model.predict')
+def _(data):
+    return None, lambda _: data.model.predict(data.features)
+
+
+@case('model.predict_proba')
+def _(data):
+    return None, lambda _: data.model.predict_proba(data.features)
+
+
+@case('scoring.format_output')
+def _(data):
+    unformatted = data.upload_df.assign(is_fraud=0)
+    return unformatted.copy, format_output
+
+
+@case('scoring.score_csv_stream')
+def _(data):
+    output_path = data.workdir / 'streamed.parquet'
+    return None, lambda _: score_csv_stream(io.BytesIO(data.csv), output_path, data.preprocessor, data.model)
+
+
+@case('scoring.top_k_risk')
+def _(data):
+    probabilities = data.model.predict_proba(data.features)[:, 1]
+    return None, lambda _: top_k_risk(probabilities, 1000)
+
+
+@case('storage.write_processed')
+def _(data):
+    output_path = data.workdir / 'written.parquet'
+    return data.scored_df.copy, lambda scored_df: write_processed(scored_df, output_path)
+
+
+@case('upload.end_to_end')
+def _(data):
+    # * POST /upload through the Flask test client, then poll the job until the result is stored
+    flask_app = load_flask_app(data.workdir)
+    client = flask_app.server.test_client()
+
+    def prepare():
+        # * Drop the stored result, or the upload would be answered from the result store
+        for path in flask_app.RESULT_STORE.directory.glob('*.parquet'):
+            path.unlink()
+
+    def run(_):
+        response = client.post('/upload', data={'file': (io.BytesIO(data.csv), 'transactions.csv')},
+                               content_type='multipart/form-data', headers={'Accept': 'application/json'})
+        job = response.get_json()
+        while job['state'] not in ('done', 'failed'):
+            time.sleep(0.002)
+            job = client.get(job['links']['self']).get_json()
+        if job['state'] == 'failed':
+            raise RuntimeError(job['error'])
+
+    return prepare, run
+
+
+@case('dashboard.load')
+def _(data):
+    return None, lambda _: load_dashboard_frame(data.processed_path)
+
+
+@case('dashboard.cube')
+def _(data):
+    dashboard_df = load_dashboard_frame(data.processed_path)
+    return None, lambda _: AggregateCube(dashboard_df, features=['category', 'state'])
+
+
+def figure_case(name, build):
+    # * Each figure is built from a fresh cube (its tables are cached) and serialized like a Dash callback
+    @case(f'dashboard.figure.{name}')
+    def _(data):
+        from plotly.utils import PlotlyJSONEncoder
+        dashboard_df = load_dashboard_frame(data.processed_path)
+        return (lambda: AggregateCube(dashboard_df, features=['category', 'state']),
+                lambda cube: json.dumps(build(cube), cls=PlotlyJSONEncoder))
+
+
+def register_figures():
+    from dashboard_figures import age_histogram, bar_chart, density_map, gender_pie, map_grid, transactions_map
+
+    figure_case('bar_chart', lambda cube: bar_chart(cube, -1, 'category'))
+    figure_case('age_histogram', lambda cube: age_histogram(cube, -1))
+    figure_case('gender_pie', lambda cube: gender_pie(cube, -1))
+    figure_case('transactions_map', lambda cube: transactions_map(cube, -1))
+    figure_case('density_map', lambda cube: density_map(cube, -1, *map_grid(cube, -1)))
+
+
+register_figures()
+
+
+_FLASK_APP = {}
+
+
+def load_flask_app(workdir):
+    """Import flask_app once, with its result store and card state in `workdir` instead of the repo."""
+    if 'module' not in _FLASK_APP:
+        # * Set before the import: flask_app opens both stores (creating their files) as it loads
+        os.environ['FRAUD_DATA_DIR'] = str(Path(workdir) / 'data')
+        os.environ['FRAUD_FEATURE_STORE'] = str(Path(workdir) / 'card_features.sqlite')
+        import flask_app
+        _FLASK_APP['module'] = flask_app
+    return _FLASK_APP['module']
+
+
+### RUNNING AND STORING ###
+################################################################################
+def measure(setup, data, repeat):
+    """Best, median and mean seconds of `repeat` timed runs, after one untimed warm-up run."""
+    prepare, run = setup(data)
+    times = []
+    for attempt in range(repeat + 1):
+        prepared = prepare() if prepare is not None else None
+        start = time.perf_counter()
+        run(prepared)
+        elapsed = time.perf_counter() - start
+        if attempt:
+            times.append(elapsed)
+    return {'min': min(times), 'median': statistics.median(times), 'mean': statistics.fmean(times), 'repeat': repeat}
+
+
+def git_commit():
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=BENCHMARKS_DIR, capture_output=True, text=True).stdout.strip()
+    return git('rev-parse', '--short', 'HEAD') or 'unknown', bool(git('status', '--porcelain', '--untracked-files=no'))
+
+
+def environment():
+    import pyarrow
+    import sklearn
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'pyarrow': pyarrow.__version__,
+        'sklearn': sklearn.__version__,
+    }
+
+
+def latest_results(exclude=None):
+    runs = sorted(path for path in RESULTS_DIR.glob('*.json') if path != exclude)
+    return runs[-1] if runs else None
+
+
+def compare(baseline_path, results):
+    """Print every case against the same case in `baseline_path`; returns the number that got slower."""
+    baseline = {(result['name'], result['rows']): result for result in json.loads(Path(baseline_path).read_text())['results']}
+    regressions = 0
+    print(f"\ncompared with {baseline_path.name}")
+    print(f"{'case':<40} {'rows':>9} {'before (ms)':>12} {'after (ms)':>11} {'ratio':>7}")
+    for result in results:
+        before = baseline.get((result['name'], result['rows']))
+        if before is None:
+            continue
+        ratio = result['min'] / before['min']
+        slower = ratio > 1 + REGRESSION
+        regressions += slower
+        print(f"{result['name']:<40} {result['rows']:>9} {before['min'] * 1000:>12.1f} {result['min'] * 1000:>11.1f} "
+              f"{ratio:>6.2f}x{' slower' if slower else ''}")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Time the upload, scoring and dashboard hot paths on synthetic transactions.")
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)), help="comma separated row counts")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per case")
+    parser.add_argument('--filter', default='', help="only run cases whose name contains this")
+    parser.add_argument('--compare', nargs='?', const='latest', default=None,
+                        help="compare with an earlier results file (default: the latest one)")
+    parser.add_argument('--no-save', action='store_true', help="do not write the results file")
+    args = parser.parse_args()
+
+    commit, dirty = git_commit()
+    cases = [(name, setup) for name, setup in CASES if args.filter in name]
+    results = []
+    print(f"{'case':<40} {'rows':>9} {'best (ms)':>11} {'median (ms)':>12} {'rows/s':>13}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in map(int, args.sizes.split(',')):
+            data = Data(rows, workdir)
+            for name, setup in cases:
+                result = {'name': name, 'rows': rows, **measure(setup, data, max(args.repeat, 1))}
+                results.append(result)
+                print(f"{name:<40} {rows:>9} {result['min'] * 1000:>11.1f} {result['median'] * 1000:>12.1f} {rows / result['min']:>13,.0f}")
+
+    saved = None
+    if not args.no_save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        created_at = datetime.now(timezone.utc)
+        saved = RESULTS_DIR / f"{created_at:%Y%m%dT%H%M%S}-{commit}{'-dirty' if dirty else ''}.json"
+        saved.write_text(json.dumps({
+            'commit': commit,
+            'dirty': dirty,
+            'created_at': created_at.isoformat(),
+            'environment': environment(),
+            'results': results,
+        }, indent=1))
+        print(f"\nsaved {saved}")
+
+    if args.compare is not None:
+        baseline_path = latest_results(exclude=saved) if args.compare == 'latest' else Path(args.compare)
+        if baseline_path is None:
+            print("\nno earlier results to compare with")
+        elif compare(baseline_path, results):
+            sys.exit(1)
@@ -0,0 +1,65 @@
+# IMPORT DEPENDENCIES
+# ----------------------------------------------------------------
+# * Analysis and manipulation libraries
+import numpy as np
+import pandas as pd
+################################################################################
+
+
+### SYNTHETIC TRANSACTIONS ###
+################################################################################
+# * Column order of the uploaded statement files (Kaggle schema, 'gender' moved last as in model.pkl)
+UPLOAD_COLUMNS = [
+    'trans_date_trans_time', 'cc_num', 'merchant', 'category', 'amt', 'first', 'last',
+    'street', 'city', 'state', 'zip', 'lat', 'long', 'city_pop', 'job', 'dob',
+    'trans_num', 'unix_time', 'merch_lat', 'merch_long', 'gender'
+]
+
+# * Kaggle categories
+CATEGORIES = [
+    'entertainment', 'food_dining', 'gas_transport', 'grocery_net', 'grocery_pos',
+    'health_fitness', 'home', 'kids_pets', 'misc_net', 'misc_pos', 'personal_care',
+    'shopping_net', 'shopping_pos', 'travel'
+]
+
+STATES = ['AL', 'AZ', 'CA', 'CO', 'FL', 'GA', 'IL', 'MI', 'MO', 'NY', 'OH', 'PA', 'TX', 'WA']
+
+
+def make_transactions(num_rows, num_cards=1000, num_merchants=700, seed=2023):
+    """Generate `num_rows` transactions shaped like an uploaded statement file."""
+    rng = np.random.default_rng(seed)
+
+    # * Card holders: every card keeps the same personal details across its transactions
+    card = rng.integers(0, num_cards, num_rows)
+    card_lat = rng.uniform(25.0, 48.0, num_cards)
+    card_long = rng.uniform(-123.0, -70.0, num_cards)
+    card_dob = pd.Timestamp('1940-01-01') + pd.to_timedelta(rng.integers(0, 60 * 365, num_cards), unit='D')
+
+    merchant = rng.integers(0, num_merchants, num_rows)
+    start = pd.Timestamp('2019-01-01').value // 10**9
+    stop = pd.Timestamp('2020-12-31 23:59:59').value // 10**9
+    unix_time = rng.integers(start, stop, num_rows)
+
+    return pd.DataFrame({
+        'trans_date_trans_time': pd.to_datetime(unix_time, unit='s').strftime('%Y-%m-%d %H:%M:%S'),
+        'cc_num': 4000000000000000 + card,
+        'merchant': np.char.add('fraud_Merchant ', merchant.astype(str)),
+        'category': np.asarray(CATEGORIES)[rng.integers(0, len(CATEGORIES), num_rows)],
+        'amt': np.round(rng.lognormal(3.5, 1.2, num_rows), 2),
+        'first': np.char.add('First', (card % 350).astype(str)),
+        'last': np.char.add('Last', (card % 480).astype(str)),
+        'street': np.char.add(card.astype(str), ' Main St'),
+        'city': np.char.add('City', (card % 890).astype(str)),
+        'state': np.asarray(STATES)[card % len(STATES)],
+        'zip': 10000 + card % 89999,
+        'lat': card_lat[card],
+        'long': card_long[card],
+        'city_pop': 100 + (card * 7919) % 2000000,
+        'job': np.char.add('Job ', (card % 490).astype(str)),
+        'dob': card_dob[card].strftime('%Y-%m-%d'),
+        'trans_num': np.char.add('t', np.arange(num_rows).astype(str)),
+        'unix_time': unix_time - 220000000,
+        'merch_lat': card_lat[card] + rng.uniform(-1.0, 1.0, num_rows),
+        'merch_long': card_long[card] + rng.uniform(-1.0, 1.0, num_rows),
+        'gender': np.where(card % 2 == 0, 'M', 'F'),
+    }, columns=UPLOAD_COLUMNS)
@@ -0,0 +1,343 @@
+# IMPORT DEPENDENCIES
+# ----------------------------------------------------------------
+# * Dashboard libraries
+from dash import Dash, html, dcc, ctx
+from dash.dependencies import Output, Input, State
+from dash.exceptions import PreventUpdate
+from dash_bootstrap_templates import load_figure_template
+import dash_bootstrap_components as dbc
+
+# * Dashboard data, figures and their cache
+from dashboard_cube import FEATURE_OPTIONS, selection
+from dashboard_data import DashboardDataset
+from figure_cache import FigureCache
+from dashboard_figures import (FILTER_LABELS, MAP_MODES, SORT_BAR_CHART, age_histogram, bar_chart, density_map,
+                               gender_pie, map_grid, map_view, transactions_map)
+from metrics import stage
+################################################################################
+
+
+### DASH APP ###
+########################################################################
+# Imported by flask_app.py only when /dashboard/ is first requested (see dashboard_mount.py),
+# so the scoring routes never load Dash, Plotly or the stored results.
+
+# * How often open dashboards check for new data (ms)
+DATASET_POLL_INTERVAL = 15_000
+
+# * Importing external stylesheets
+dbc_css = "https://cdn.jsdelivr.net/gh/AnnMarieW/dash-bootstrap-templates/dbc.min.css"
+
+
+# * Determining the app_layout
+def dashboard_layout():
+    return html.Div([
+        html.Header([
+            html.Meta(charSet='UTF-8'),
+            html.Meta(name='viewport', content='width=device-width, initial-scale=1.0'),
+            html.Meta(httpEquiv='X-UA-Compatible', content='ie=edge'),
+            html.Title('Credit Card Fraud Analysis-dashboard'),
+            # Define the CSS links
+            html.Link(rel='preconnect', href='https://fonts.googleapis.com'),
+            html.Link(rel='preconnect', href='https://fonts.gstatic.com', crossOrigin='true'),
+            html.Link(rel='stylesheet', href='/static/styles.css'),  # Replace with the correct path
+        ]),
+        
+        html.Nav(className='navbar navbar-dark bg-dark fixed-top', children=[
+            html.Div(className='container-fluid', children=[
+                html.A('Gal Beeri, Katharine Tamas, Mireille Walton', className='navbar-brand'),
+                html.Button(type='button', style={'font-size': '14px'}, className='navbar-toggler', **{
+                    'data-bs-toggle': 'offcanvas',
+                    'data-bs-target': '#offcanvasDarkNavbar',
+                    'aria-controls': 'offcanvasDarkNavbar',
+                    'aria-label': 'Toggle navigation'
+                }, children=[
+                    dcc.Link('Home', className='nav-link', href='/', target="_blank"),
+                ]),
+            ]),
+        ]),
+
+        # HERO BANNER
+        html.Div(className='hero_banner', style={'height': '20px'}, children=[
+            html.Img(src='/static/images/homepg_image.jpg', width='100%', height='425px'),
+            html.Div(className='container-fluid', children=[
+                html.Br(),
+                html.Div(className='row', children=[
+                    html.Div(className='col-md-2'),
+                    html.Div(className='col-md-8', style={'height': '120px', 'margin-bottom': '300px'}, children=[
+                        html.Br(),
+                    ]),
+                    html.Div(className='col-md-2'),
+                ]),
+            ]),
+        ]),
+                    html.Div(children=[
+                        html.Div(className='container-fluid', children=[
+                            html.Div(className='row', style={'margin-top': '280px', 'backgroun-color':'rgba(15, 15, 15, 0.5)'}, children=[
+                                html.Div(className='col-3 mx-auto my-5', children=[
+                                ]),
+                            ]),
+                        ]),
+                    ]),
+
+
+        html.Div(
+            style={"width": "80%", "height": "80%", "margin-left": "8%", "margin-right": "8%", "margin-top": "2%"},
+            children=[
+            dbc.Row(html.H2(id="header"), style={"color":"white", "margin-top":"5px", "margin-bottom":"10px", "textAlign": "center"}),
+            dbc.Row(dbc.Card(dbc.RadioItems(
+                id="dataFilter",
+                options= [
+                    {'label': 'Fraudulent', 'value': 1},
+                    {'label': 'Non-Fraudulent', 'value': 0},
+                    {'label': 'All', 'value': -1}],
+                    value=0,
+                    inline=True
+            ), style={"textAlign":"center", "fontSize": "20px"})),
+        html.Br(),
+        dbc.Row([
+            dbc.Col(dcc.DatePickerRange(
+                id="dateRange",
+                display_format="YYYY-MM-DD",
+                clearable=True,
+                className='dbc'
+            ), width=4),
+            dbc.Col(dcc.Dropdown(
+                id="stateFilter",
+                multi=True,
+                placeholder="All states",
+                className='dbc'
+            ), width=4),
+            dbc.Col(dcc.Dropdown(
+                id="categoryFilter",
+                multi=True,
+                placeholder="All categories",
+                className='dbc'
+            ), width=4),
+            ]),
+        html.Br(),
+        dbc.Row([
+            dbc.Col(dbc.Card(id="totalTransactions"), style={"textAlign":"center",
+                                                            "fontSize": "30px",
+                                                            "height": "6%"},),
+            dbc.Col(dbc.Card(id="percentageFraudulent"), style={"textAlign":"center",
+                                                               "fontSize": "30px"}),
+            ]),
+        dcc.Interval(id="datasetPoll", interval=DATASET_POLL_INTERVAL),
+        dcc.Store(id="datasetVersion"),
+        html.Br(),
+        dbc.Row([
+            dbc.Col(dbc.Card([
+                dcc.Dropdown(
+                    id="features",
+                    options=FEATURE_OPTIONS,
+                    value= "category",
+                    className='dbc'
+                ),
+                dbc.RadioItems(
+                    id="asc-desc",
+                    options= [
+                        {'label': 'Ascending', 'value': True},
+                        {'label': 'Descending', 'value': False}],
+                    value=False,
+                    inline=True),
+                dcc.Store(id="barFigure"),
+                dcc.Graph(id="hBarChart"),
+                ]), width=4),
+            dbc.Col(dbc.Card(dcc.Graph(id="histogram")), width=4),
+            dbc.Col(dbc.Card(dcc.Graph(id="pieChart")), width=4)
+            ]),
+        html.Br(),
+        dbc.Row(dbc.Card([
+            dbc.RadioItems(
+                id="mapMode",
+                options=[{'label': label, 'value': mode} for mode, label in MAP_MODES.items()],
+                value="density",
+                inline=True),
+            dcc.Graph(id="scatterMapBox", style={"width": "100%"}),
+            dcc.Store(id="mapKey"),
+            ]))
+        ]),
+    ])
+
+
+def create_dashboard(data_dir, prefix="/dashboard/"):
+    """Build the dashboard over the results stored in `data_dir`, served under `prefix`.
+
+    The Dash app gets its own Flask server (flask_app.py dispatches `prefix` to it). Returns
+    the app with its dataset and figure cache, so /upload can refresh the data.
+    """
+    # * Serialized figures per (dataset version, graph, control values); cleared whenever the data changes
+    figure_cache = FigureCache(maxsize=256)
+
+    # * Figures are only built (and serialized) on a cache miss; that time goes to the figure's stage in /metrics
+    def cached_figure(key, build):
+        def timed_build():
+            with stage(f'figure.{key[0]}'):
+                figure = build()
+                return figure.to_dict() if hasattr(figure, 'to_dict') else figure
+        return figure_cache.get(key, timed_build)
+
+    # * Every stored result (data_dir/*.parquet), with derived columns, counts and KPIs;
+    # * /upload refreshes it and the dashboard polls it, so new results show up without a restart
+    stored_data = DashboardDataset(data_dir, on_change=figure_cache.invalidate)
+
+    # * Nameing the app, using the SLATE style theme and creating a route
+    app = Dash(__name__, external_stylesheets=[dbc.themes.SLATE, dbc_css], routes_pathname_prefix=prefix)
+
+    # * Configuring the SLATE style theme on the figures
+    load_figure_template("SLATE")
+
+    app.layout = dashboard_layout()
+
+    # * Configuring the Callback functions
+    # * Each graph has its own callback, so a control only recomputes the graphs it affects:
+    # * 'dataFilter' -> header, histogram, pie chart and map; 'features' -> bar chart;
+    # * 'dateRange', 'stateFilter', 'categoryFilter' -> every graph (through the cube's row index);
+    # * 'asc-desc' -> nothing on the server (the bar chart is re-sorted in the browser);
+    # * a new dataset version -> KPIs, filter choices and every graph
+    selection_inputs = [
+        Input("dateRange", "start_date"),
+        Input("dateRange", "end_date"),
+        Input("stateFilter", "value"),
+        Input("categoryFilter", "value"),
+    ]
+
+    @app.callback(
+        Output("datasetVersion", "data"),
+        Input("datasetPoll", "n_intervals"),
+        State("datasetVersion", "data"),
+        prevent_initial_call=True
+    )
+    def dashboard_dataset(n_intervals, version):
+        # * Only push a new version to the graphs when the data actually changed
+        current_version = stored_data.get()['version']
+        if current_version == version:
+            raise PreventUpdate()
+        return current_version
+
+
+    @app.callback(
+        Output("totalTransactions", "children"),
+        Output("percentageFraudulent", "children"),
+        Input("datasetVersion", "data")
+    )
+    def dashboard_totals(version):
+        kpis = stored_data.get()['kpis']
+        return f"Total Transactions: {kpis['total_transactions']}", f"Fraudulent: {kpis['percentage_fraudulent']}"
+
+
+    @app.callback(
+        Output("dateRange", "min_date_allowed"),
+        Output("dateRange", "max_date_allowed"),
+        Output("dateRange", "initial_visible_month"),
+        Output("stateFilter", "options"),
+        Output("categoryFilter", "options"),
+        Input("datasetVersion", "data")
+    )
+    def dashboard_filter_options(version):
+        options = stored_data.get()['cube'].filter_options()
+        return options['start_date'], options['end_date'], options['start_date'], options['state'], options['category']
+
+
+    @app.callback(
+        Output("header", "children"),
+        Input("dataFilter", "value")
+    )
+    def dashboard_header(filter_item):
+        # * Prevent None values
+        if filter_item is None:
+            raise PreventUpdate()
+
+        # * Match the filted label to the selected filter item and create a dynamic header
+        filter_label = FILTER_LABELS.get(filter_item, 'Unknown Filter')
+        return f"{filter_label} Dashboard"
+
+
+    @app.callback(
+        Output("barFigure", "data"),
+        Input("dataFilter", "value"),
+        Input("features", "value"),
+        Input("datasetVersion", "data"),
+        *selection_inputs
+    )
+    def dashboard_bar(filter_item, feature, version, start_date, end_date, states, categories):
+        if filter_item is None:
+            raise PreventUpdate()
+        dataset = stored_data.get()
+        selected = selection(start_date, end_date, states, categories)
+        return cached_figure(("hBarChart", dataset['version'], filter_item, feature, selected),
+                             lambda: bar_chart(dataset['cube'].select(*selected), filter_item, feature))
+
+
+    app.clientside_callback(
+        SORT_BAR_CHART,
+        Output("hBarChart", "figure"),
+        Input("barFigure", "data"),
+        Input("asc-desc", "value")
+    )
+
+
+    @app.callback(
+        Output("histogram", "figure"),
+        Input("dataFilter", "value"),
+        Input("datasetVersion", "data"),
+        *selection_inputs
+    )
+    def dashboard_histogram(filter_item, version, start_date, end_date, states, categories):
+        if filter_item is None:
+            raise PreventUpdate()
+        dataset = stored_data.get()
+        selected = selection(start_date, end_date, states, categories)
+        return cached_figure(("histogram", dataset['version'], filter_item, selected),
+                             lambda: age_histogram(dataset['cube'].select(*selected), filter_item))
+
+
+    @app.callback(
+        Output("pieChart", "figure"),
+        Input("dataFilter", "value"),
+        Input("datasetVersion", "data"),
+        *selection_inputs
+    )
+    def dashboard_pie(filter_item, version, start_date, end_date, states, categories):
+        if filter_item is None:
+            raise PreventUpdate()
+        dataset = stored_data.get()
+        selected = selection(start_date, end_date, states, categories)
+        return cached_figure(("pieChart", dataset['version'], filter_item, selected),
+                             lambda: gender_pie(dataset['cube'].select(*selected), filter_item))
+
+
+    @app.callback(
+        Output("scatterMapBox", "figure"),
+        Output("mapKey", "data"),
+        Input("dataFilter", "value"),
+        Input("datasetVersion", "data"),
+        *selection_inputs,
+        Input("mapMode", "value"),
+        Input("scatterMapBox", "relayoutData"),
+        State("mapKey", "data")
+    )
+    def dashboard_map(filter_item, version, start_date, end_date, states, categories, map_mode, relayout_data, shown_key):
+        if filter_item is None:
+            raise PreventUpdate()
+        dataset = stored_data.get()
+        selected = selection(start_date, end_date, states, categories)
+        cube = dataset['cube'].select(*selected)
+
+        if map_mode == "cities":
+            key = ("scatterMapBox", dataset['version'], filter_item, selected)
+            build = lambda: transactions_map(cube, filter_item)
+        else:
+            # * Density mode: the grid level (and, when zoomed in, the window) follows the map view
+            zoom, bounds = map_view(relayout_data)
+            level, window = map_grid(cube, filter_item, zoom, bounds)
+            key = ("densityMap", dataset['version'], filter_item, selected, level, window, round(zoom))
+            build = lambda: density_map(cube, filter_item, level, window, round(zoom))
+
+        # * Panning or zooming within the same grid level and window needs no new figure
+        if ctx.triggered_id == "scatterMapBox" and repr(key) == shown_key:
+            raise PreventUpdate()
+        return cached_figure(key, build), repr(key)
+
+    return {'app': app, 'data': stored_data, 'figure_cache': figure_cache}
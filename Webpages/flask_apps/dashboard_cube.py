@@ -0,0 +1,373 @@
+# IMPORT DEPENDENCIES
+# ----------------------------------------------------------------
+# * Analysis and manipulation libraries
+import numpy as np
+import pandas as pd
+
+# * Concurrency libraries
+import threading
+from collections import OrderedDict
+################################################################################
+
+
+### DASHBOARD AGGREGATE CUBE ###
+################################################################################
+# * Values of the 'dataFilter' radio: fraudulent, non-fraudulent, all
+FILTER_VALUES = (1, 0, -1)
+
+# * The string columns offered in the bar chart's feature dropdown: all but trans_num (one bar per
+# * transaction), as the original select_dtypes(include='object').columns[:-1]; the cube counts all of them up front
+FEATURE_OPTIONS = ['merchant', 'category', 'first', 'last', 'gender', 'street', 'city', 'state', 'job']
+
+# * Map grid cell sizes in degrees, coarsest first; each level halves the previous one (4° ... 1/32°)
+MAP_GRID_LEVELS = tuple(4.0 / 2 ** level for level in range(8))
+
+# * Grid cells are packed into one int64 key: row in the high bits, column (offset to >= 0) below
+_COLUMN_BITS = 20
+_COLUMN_OFFSET = 1 << (_COLUMN_BITS - 1)
+
+
+# * Columns the dashboard's drill-down filters select on, each with a row-id index
+INDEXED_COLUMNS = ('state', 'category')
+
+# * Filtered cubes kept per dataset, so the graphs of one selection share their rows and tables
+SELECTION_CACHE_SIZE = 16
+
+
+def selection(start_date=None, end_date=None, states=None, categories=None):
+    """The date range ('YYYY-MM-DD', both ends included), states and categories as a hashable key."""
+    return (
+        start_date[:10] if start_date else None,
+        end_date[:10] if end_date else None,
+        tuple(sorted(states or ())),
+        tuple(sorted(categories or ())),
+    )
+
+
+def sorted_contains(sorted_ids, values):
+    """Which of `values` occur in the ascending array `sorted_ids`, by binary search."""
+    if not len(sorted_ids):
+        return np.zeros(len(values), dtype=bool)
+    positions = np.minimum(np.searchsorted(sorted_ids, values), len(sorted_ids) - 1)
+    return sorted_ids[positions] == values
+
+
+class RowIndex:
+    """Row ids of the dashboard rows by time and by value of each INDEXED_COLUMNS column.
+
+    The transaction times are kept as a sorted array, so a date range is two binary
+    searches. DashboardDataset keeps its rows in time order, which makes the range one run
+    of consecutive row ids; for rows in any other order the argsort is kept alongside.
+    Each indexed column maps its values to the ascending ids of their rows (one stable
+    argsort of the category codes, cut at the value boundaries), built the first time the
+    column is filtered on. Selections intersect these lists smallest first, so their cost
+    grows with the rows they select rather than with the rows loaded.
+    """
+
+    def __init__(self, sample_df):
+        times = sample_df['trans_date_trans_time'].to_numpy()
+        self._data = sample_df
+        self.id_dtype = np.int32 if len(times) < 2 ** 31 else np.int64
+        # * NaT is the smallest int64, so rows with missing times also take the argsort path (which sorts them last)
+        if len(times) > 1 and (np.diff(times.view(np.int64)) < 0).any():
+            self.order = np.argsort(times, kind='stable').astype(self.id_dtype)
+            self.times = times[self.order]
+        else:
+            self.order = None
+            self.times = times
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def span(self):
+        """First and last transaction time, or None without any."""
+        # * Missing times sort last and binary search treats NaT as the largest time
+        valid = np.searchsorted(self.times, np.datetime64('NaT'))
+        return (self.times[0], self.times[valid - 1]) if valid else None
+
+    def values(self, column):
+        """{value: ascending row ids} for an indexed column."""
+        index = self._values.get(column)
+        if index is None:
+            with self._lock:
+                index = self._values.get(column)
+                if index is None:
+                    index = self._values[column] = self._build_values(column)
+        return index
+
+    def _build_values(self, column):
+        values = self._data[column]
+        if not isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype('category')
+        codes = values.cat.codes.to_numpy()
+        order = np.argsort(codes, kind='stable').astype(self.id_dtype)
+        # * Missing values (code -1) sort first; skip past them
+        counts = np.bincount(codes[codes >= 0], minlength=len(values.cat.categories))
+        starts = len(codes) - counts.sum() + np.concatenate([[0], np.cumsum(counts)])
+        return {str(category): order[starts[code]:starts[code + 1]]
+                for code, category in enumerate(values.cat.categories) if counts[code]}
+
+    def select(self, start=None, end=None, filters=()):
+        """Ascending ids of the rows timed in [start, end) that match every (column, values) filter.
+
+        `start` and `end` are datetime64 values (None for open ends); a filter keeps the rows
+        whose column has any of its values. Returns None when nothing is filtered.
+        """
+        lists = []
+        for column, wanted in filters:
+            index = self.values(column)
+            ids = [index[value] for value in wanted if value in index]
+            lists.append(ids[0] if len(ids) == 1 else np.sort(np.concatenate(ids)) if ids else np.empty(0, self.id_dtype))
+
+        if start is not None or end is not None:
+            lo = 0 if start is None else int(np.searchsorted(self.times, start.astype(self.times.dtype)))
+            hi = len(self.times) if end is None else int(np.searchsorted(self.times, end.astype(self.times.dtype)))
+            if self.order is None:
+                # * Rows in time order: the range is rows lo .. hi - 1, and each list is cut to it by binary search
+                lists = [ids[np.searchsorted(ids, lo):np.searchsorted(ids, hi)] for ids in lists] or [np.arange(lo, hi, dtype=self.id_dtype)]
+            else:
+                lists.append(np.sort(self.order[lo:hi]))
+
+        if not lists:
+            return None
+        lists.sort(key=len)
+        rows = lists[0]
+        for ids in lists[1:]:
+            rows = rows[sorted_contains(ids, rows)]
+        return rows
+
+
+def grid_counts(rows, cols, weights=None):
+    """Sum `weights` (default 1) per (row, col) grid cell with NumPy; returns (rows, cols, counts)."""
+    keys, inverse = np.unique((rows << _COLUMN_BITS) + (cols + _COLUMN_OFFSET), return_inverse=True)
+    counts = np.bincount(inverse.ravel(), weights=weights, minlength=len(keys)).astype(np.int64)
+    return keys >> _COLUMN_BITS, (keys & ((1 << _COLUMN_BITS) - 1)) - _COLUMN_OFFSET, counts
+
+
+class AggregateCube:
+    """Transaction counts per (is_fraud filter x dimension), computed once per dataset load.
+
+    The dashboard callbacks only slice these small tables, so their cost no longer grows
+    with the number of loaded transactions. The age, gender and map tables and the bar
+    chart table of every one of `features` are built up front; each feature is counted for
+    all filters in one pass over its codes. Categorical columns only count observed values.
+
+    Coordinates are also binned into the finest MAP_GRID_LEVELS grid up front; coarser
+    levels are summed from it on demand (the sizes are powers of two, so cells nest).
+
+    Only the row numbers of each filter are kept; a table is built from a temporary copy of
+    just the columns it needs, so a memory-mapped `sample_df` (see transaction_store.py) is
+    never copied as a whole.
+
+    `select()` narrows the cube to a date range, states and categories through its RowIndex.
+    The result is a cube over just those `rows` of the same `sample_df`, whose tables are
+    all built on first use.
+
+    `updated()` carries the counts over to the next dataset instead of recounting every row;
+    `tables` seeds a cube with tables counted that way.
+    """
+
+    def __init__(self, sample_df, features=FEATURE_OPTIONS, rows=None, tables=None):
+        is_fraud = sample_df['is_fraud'].to_numpy()
+        self._data = sample_df
+        self.features = tuple(features)
+        if rows is None:
+            self._rows = {
+                1: np.flatnonzero(is_fraud == 1),
+                0: np.flatnonzero(is_fraud == 0),
+                -1: None,
+            }
+        else:
+            is_fraud = is_fraud[rows]
+            self._rows = {1: rows[is_fraud == 1], 0: rows[is_fraud == 0], -1: rows}
+        self._lock = threading.RLock()
+        self._tables = dict(tables or {})
+        self._selections = OrderedDict()
+        self.index = RowIndex(sample_df) if rows is None else None
+        if rows is not None:
+            return
+        for filter_item in FILTER_VALUES:
+            self.age(filter_item)
+            self.gender(filter_item)
+            self.map(filter_item)
+            self.density(filter_item, len(MAP_GRID_LEVELS) - 1)
+        for feature in self.features:
+            if not all((filter_item, 'feature', feature) in self._tables for filter_item in FILTER_VALUES):
+                self._count_feature(feature)
+
+    def updated(self, sample_df, added_df, removed_df):
+        """The cube over `sample_df`: this cube's rows less `removed_df`, plus `added_df`.
+
+        Every table built up front is a count per key, so it is carried over with the counts
+        of the added rows (a cube of their own) added and those of the removed rows taken
+        off. Only tables without a key column (a 'trans_num' feature) are counted again; the
+        row ids, index and coarser map levels are rebuilt for `sample_df` as usual.
+        """
+        changes = [(AggregateCube(df, features=self.features), sign) for df, sign in ((added_df, 1), (removed_df, -1)) if len(df)]
+        finest = ('density', len(MAP_GRID_LEVELS) - 1)
+        tables = {}
+        for key, table in self._tables.items():
+            dimension = key[1:]
+            if dimension[0] in ('age', 'gender', 'map') or dimension == finest or (dimension[0] == 'feature' and dimension[1] in self.features):
+                if list(table.columns) != ['trans_num']:
+                    tables[key] = merge_counts(table, [(cube._tables[key], sign) for cube, sign in changes], sample_df)
+        return AggregateCube(sample_df, features=self.features, tables=tables)
+
+    def select(self, start_date=None, end_date=None, states=None, categories=None):
+        """The cube over transactions between two 'YYYY-MM-DD' dates (both included) in any of
+        `states` and any of `categories`; None or empty leaves that filter open."""
+        key = selection(start_date, end_date, states, categories)
+        if key == (None, None, (), ()) or self.index is None:
+            return self
+        with self._lock:
+            cube = self._selections.get(key)
+            if cube is not None:
+                self._selections.move_to_end(key)
+                return cube
+
+        start_date, end_date, states, categories = key
+        filters = [(column, values) for column, values in zip(INDEXED_COLUMNS, (states, categories)) if values]
+        rows = self.index.select(
+            np.datetime64(start_date, 'D') if start_date else None,
+            np.datetime64(end_date, 'D') + 1 if end_date else None,
+            filters,
+        )
+        cube = AggregateCube(self._data, rows=rows)
+        with self._lock:
+            self._selections[key] = cube
+            while len(self._selections) > SELECTION_CACHE_SIZE:
+                self._selections.popitem(last=False)
+        return cube
+
+    def filter_options(self):
+        """First and last transaction dates and the values of each indexed column, for the filter controls."""
+        span = self.index.span() if self.index is not None else None
+        options = {
+            'start_date': str(span[0].astype('datetime64[D]')) if span else None,
+            'end_date': str(span[1].astype('datetime64[D]')) if span else None,
+        }
+        for column in INDEXED_COLUMNS:
+            values = self._data[column]
+            categories = values.cat.categories if isinstance(values.dtype, pd.CategoricalDtype) else values.dropna().unique()
+            options[column] = sorted(map(str, categories))
+        return options
+
+    def feature(self, filter_item, feature):
+        """Counts per value of `feature`, sorted by the feature like a plain groupby."""
+        return self._table(filter_item, ('feature', feature), list(dict.fromkeys([feature, 'trans_num'])),
+                           lambda df: df.groupby(feature, as_index=False, observed=True)["trans_num"].count())
+
+    def _count_feature(self, feature):
+        """Build `feature`'s table for every filter from one set of codes, as feature() would."""
+        values = self._data[feature]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes, keys = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            codes, keys = pd.factorize(values, sort=True)
+        codes = codes.astype(np.intp) + 1
+        # * Like groupby(...)['trans_num'].count(): rows without a key are dropped, and a key
+        # * whose rows have no trans_num is kept with a count of 0
+        counted = self._data['trans_num'].notna().to_numpy()
+        counted = None if counted.all() else counted
+
+        for filter_item in FILTER_VALUES:
+            rows = self._rows[filter_item]
+            selected = codes if rows is None else codes[rows]
+            present = np.bincount(selected, minlength=len(keys) + 1)[1:]
+            counts = present if counted is None else np.bincount(
+                selected, weights=counted if rows is None else counted[rows], minlength=len(keys) + 1)[1:].astype(np.int64)
+            observed = np.flatnonzero(present)
+            # * For 'trans_num' itself the counts replace the keys, as they do in the groupby
+            table = pd.DataFrame({
+                feature: pd.Categorical.from_codes(observed, categories=keys) if isinstance(values.dtype, pd.CategoricalDtype) else keys[observed],
+                'trans_num': counts[observed],
+            })
+            self._tables[(filter_item, 'feature', feature)] = plain_columns(table)
+
+    def age(self, filter_item):
+        return self._table(filter_item, ('age',), ['age', 'trans_num'],
+                           lambda df: df.groupby("age", as_index=False, observed=True)['trans_num'].count())
+
+    def gender(self, filter_item):
+        return self._table(filter_item, ('gender',), ['gender', 'trans_num'],
+                           lambda df: df.groupby("gender", as_index=False, observed=True)["trans_num"].count())
+
+    def map(self, filter_item):
+        return self._table(filter_item, ('map',), ['city', 'lat', 'long', 'trans_num'],
+                           lambda df: df.groupby(["city", "lat", "long"], observed=True)["trans_num"].count().reset_index())
+
+    def density(self, filter_item, level):
+        """Transaction counts per grid cell of MAP_GRID_LEVELS[level] degrees, with cell centers."""
+        finest = len(MAP_GRID_LEVELS) - 1
+        if level == finest:
+            build = lambda df: self._grid(
+                np.floor(df['lat'].to_numpy(dtype=np.float64) / MAP_GRID_LEVELS[finest]).astype(np.int64),
+                np.floor(df['long'].to_numpy(dtype=np.float64) / MAP_GRID_LEVELS[finest]).astype(np.int64),
+                level,
+            )
+        else:
+            # * Each coarser level doubles the cell size, so finest indexes shift right by the difference
+            def build(df):
+                cells = self.density(filter_item, finest)
+                shift = finest - level
+                return self._grid(cells['row'].to_numpy() >> shift, cells['col'].to_numpy() >> shift,
+                                  level, cells['trans_num'].to_numpy())
+        return self._table(filter_item, ('density', level), ['lat', 'long'] if level == finest else [], build)
+
+    def _grid(self, rows, cols, level, weights=None):
+        rows, cols, counts = grid_counts(rows, cols, weights)
+        cell_size = MAP_GRID_LEVELS[level]
+        return pd.DataFrame({
+            'row': rows,
+            'col': cols,
+            'lat': (rows + 0.5) * cell_size,
+            'long': (cols + 0.5) * cell_size,
+            'trans_num': counts,
+        })
+
+    def _table(self, filter_item, dimension, columns, build):
+        # * Anything other than 1 or 0 shows all transactions, like the original callback
+        filter_item = filter_item if filter_item in (1, 0) else -1
+        key = (filter_item,) + dimension
+        table = self._tables.get(key)
+        if table is None:
+            with self._lock:
+                table = self._tables.get(key)
+                if table is None:
+                    table = self._tables[key] = plain_columns(build(self._frame(filter_item, columns)))
+        return table
+
+    def _frame(self, filter_item, columns):
+        rows = self._rows[filter_item]
+        if rows is None:
+            return self._data[columns]
+        # * Take the rows column by column: selecting the columns first would copy them whole
+        return pd.DataFrame({column: self._data[column].array.take(rows) for column in columns}, copy=False)
+
+
+def merge_counts(table, changes, sample_df):
+    """Add the (table, +1 or -1) `changes` into the count table `table`, keyed on its other columns.
+
+    Categorical keys take `sample_df`'s categories, so the result is ordered like a groupby
+    over `sample_df`; keys whose count drops to zero are dropped.
+    """
+    keys = [column for column in table.columns if column != 'trans_num']
+    changes = [change.assign(trans_num=sign * change['trans_num']) for change, sign in changes]
+    changes = [change for change in changes if len(change)]
+    for key in keys:
+        if key in sample_df and isinstance(sample_df[key].dtype, pd.CategoricalDtype):
+            table = table.assign(**{key: table[key].astype(sample_df[key].dtype)})
+            changes = [change.assign(**{key: change[key].astype(sample_df[key].dtype)}) for change in changes]
+    if not changes:
+        return table
+
+    frames = [frame for frame in [table] + changes if len(frame)]
+    merged = pd.concat(frames, ignore_index=True).groupby(keys, observed=True, sort=True)['trans_num'].sum().reset_index()
+    return plain_columns(merged[merged['trans_num'] != 0].reset_index(drop=True))
+
+
+def plain_columns(table):
+    """Turn Arrow-backed columns (strings and counts from the transaction store) into NumPy ones for Plotly."""
+    arrow_dtypes = {name: dtype.numpy_dtype for name, dtype in table.dtypes.items() if isinstance(dtype, pd.ArrowDtype)}
+    if not arrow_dtypes:
+        return table
+    return table.astype({name: object if dtype.kind == 'U' else dtype for name, dtype in arrow_dtypes.items()})
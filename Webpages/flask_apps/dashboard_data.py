@@ -0,0 +1,246 @@
+# IMPORT DEPENDENCIES
+# ----------------------------------------------------------------
+# * Directory libraries
+from pathlib import Path
+
+# * Analysis and manipulation libraries
+import pandas as pd
+import numpy as np
+from pandas.api.types import union_categoricals
+
+# * Concurrency and timing libraries
+import threading
+import time
+
+# * Processed data and dashboard aggregates
+from processed_data import DASHBOARD_COLUMNS, PROCESSED_DATA_PATH, processed_parts, read_processed
+from dashboard_cube import FEATURE_OPTIONS, AggregateCube
+from transaction_store import STORE_DIRNAME, prune_stores, read_store, store_path, write_store
+from metrics import stage
+################################################################################
+
+
+### DASHBOARD DATASET ###
+################################################################################
+# * Every row is tagged with the file name of its part, so an evicted part's rows can be dropped
+PART_COLUMN = 'part'
+
+
+def clean_categories(values, clean):
+    """Apply the string function `clean` once per distinct value instead of once per row.
+
+    `values` comes back as a categorical with sorted categories; values that clean to the
+    same string share one category.
+    """
+    values = values.astype('category')
+    codes = values.cat.codes.to_numpy()
+    cleaned_codes, categories = pd.factorize(clean(values.cat.categories.to_series()), sort=True)
+    codes = np.where(codes >= 0, cleaned_codes[codes], -1)
+    return pd.Series(pd.Categorical.from_codes(codes, categories), index=values.index, name=values.name)
+
+
+def dashboard_frame(processed_df):
+    """Add the dashboard's derived columns to freshly loaded processed rows."""
+    # * Formatting category & merchant
+    processed_df['merchant'] = clean_categories(processed_df['merchant'], lambda names: names.str.replace("fraud_", ""))
+    processed_df['category'] = clean_categories(processed_df['category'], lambda names: names.str.replace("_", " "))
+
+    # * Calculating the age (in whole 365-day years) of the person at the time of the transaction
+    processed_df['age'] = (processed_df['trans_date_trans_time'] - processed_df['dob']).dt.days // 365
+
+    # * Dropping the dob column
+    processed_df = processed_df.drop('dob', axis=1)
+
+    # * Modifying the gender column
+    processed_df['gender'] = clean_categories(processed_df['gender'], lambda names: names.str.replace("M", "Male").str.replace("F", "Female"))
+    return processed_df
+
+
+def load_dashboard_frame(path):
+    """Read one processed file (Parquet part or CSV export) into dashboard rows."""
+    return dashboard_frame(read_processed(path, columns=DASHBOARD_COLUMNS))
+
+
+def load_part(path):
+    """Dashboard rows of one processed part, tagged with the part's file name."""
+    part_df = load_dashboard_frame(path)
+    part_df[PART_COLUMN] = pd.Categorical.from_codes(np.zeros(len(part_df), dtype=np.int8), categories=[path.name])
+    return part_df
+
+
+def dashboard_kpis(sample_df):
+    """Headline numbers shown above the graphs."""
+    # * Amount of transactions in the dataset
+    total_transactions = int(sample_df['trans_num'].count())
+
+    # * The percentage of fraudulent transactions relative to non-fraudulent transactions
+    fraudulent = int((sample_df['is_fraud'] == 1).sum())
+    non_fraudulent = int((sample_df['is_fraud'] == 0).sum())
+    percentage_fraudulent = round(fraudulent / non_fraudulent, 3) if non_fraudulent else 0.0
+
+    return {
+        'total_transactions': f"{total_transactions:,}",
+        'percentage_fraudulent': f"{percentage_fraudulent}%",
+    }
+
+
+def concat_frames(frames):
+    # * pd.concat turns categoricals with different categories into objects; align them first
+    frames = [frame for frame in frames if len(frame)] or frames[:1]
+    for column in frames[0].columns:
+        if all(isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames) and len(frames) > 1:
+            categories = union_categoricals([frame[column] for frame in frames], sort_categories=True).categories
+            frames = [frame.assign(**{column: frame[column].cat.set_categories(categories)}) for frame in frames]
+        # * Stored times are in seconds and fresh ones in nanoseconds; pandas cannot concat the two
+        elif len({frame[column].dtype for frame in frames if frame[column].dtype.kind == 'M'}) > 1:
+            frames = [frame.assign(**{column: frame[column].astype('datetime64[ns]')}) for frame in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+def in_time_order(sample_df):
+    # * Rows sorted by time make a date range one slice of row ids (see RowIndex in dashboard_cube.py)
+    times = sample_df['trans_date_trans_time']
+    if times.is_monotonic_increasing:
+        return sample_df
+    return sample_df.sort_values('trans_date_trans_time', kind='stable', ignore_index=True)
+
+
+def merge_in_time_order(sample_df, new_df):
+    """The rows of both frames in time order, given `sample_df` already in it.
+
+    Only the new rows are sorted; each is then placed after the existing rows with the same
+    or an earlier time (binary search), so the result matches a stable sort of both frames.
+    """
+    new_df = in_time_order(new_df)
+    combined = concat_frames([sample_df, new_df])
+    if not len(sample_df) or not len(new_df):
+        return combined
+    times = combined['trans_date_trans_time'].to_numpy()
+    old_times, new_times = times[:len(sample_df)], times[len(sample_df):]
+    # * NaT sorts last here as in in_time_order
+    positions = np.searchsorted(old_times, new_times, side='right') + np.arange(len(new_times))
+    if positions[0] == len(sample_df):
+        # * Every new row comes after the existing ones: already in order
+        return combined
+    is_new = np.zeros(len(times), dtype=bool)
+    is_new[positions] = True
+    order = np.empty(len(times), dtype=np.intp)
+    order[is_new] = np.arange(len(sample_df), len(times))
+    order[~is_new] = np.arange(len(sample_df))
+    return combined.take(order).reset_index(drop=True)
+
+
+class DashboardDataset:
+    """The dashboard's transactions, kept in step with the processed data directory.
+
+    Every scored upload adds a Parquet part (see result_store.py). `refresh()` reads only
+    the parts it has not seen, derives their dashboard columns, merges them into the rows
+    (kept in time order) and swaps in a new snapshot (rows, aggregate cube, KPIs) for every
+    thread at once. Rows are tagged with their part, so the rows of an evicted part are
+    dropped without reloading the rest, and the cube is updated by the added and removed
+    rows rather than recounted. `/upload` calls it right after writing; other workers pick
+    the new part up through `get()`, which looks at the directory at most every
+    `check_interval` seconds. `on_change` is called after
+    each swap, e.g. to drop cached figures.
+
+    The rows are served from a compact, memory-mapped store in `directory`/dashboard_store
+    (see transaction_store.py), one per set of parts: the first worker to see a new set
+    writes it and every other worker just maps it, so N workers share one copy of the rows.
+    Pass `use_store=False` to keep them in private memory instead.
+    """
+
+    def __init__(self, directory=PROCESSED_DATA_PATH, features=FEATURE_OPTIONS, check_interval=1.0, on_change=None, use_store=True):
+        self.directory = Path(directory)
+        self.store_dir = self.directory / STORE_DIRNAME if use_store else None
+        self.features = tuple(features)
+        self.check_interval = check_interval
+        self.on_change = on_change
+        self._lock = threading.Lock()
+        self._parts = []
+        self._last_check = 0.0
+        self._empty = dashboard_frame(pd.DataFrame(columns=DASHBOARD_COLUMNS).astype({'trans_date_trans_time': 'datetime64[ns]', 'dob': 'datetime64[ns]'}))
+        self._empty[PART_COLUMN] = pd.Categorical([])
+        self._current = self._snapshot(self._empty, version=0)
+        self.refresh()
+
+    def get(self):
+        """Return the current snapshot, loading new parts first if there are any."""
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            if processed_parts(self.directory) != self._parts:
+                self.refresh()
+        return self._current
+
+    def refresh(self):
+        """Merge in any parts written and drop any evicted since the last refresh; returns the current snapshot."""
+        with self._lock:
+            parts = processed_parts(self.directory)
+            listed, loaded = set(parts), set(self._parts)
+            evicted = [part.name for part in self._parts if part not in listed]
+            new_parts = [part for part in parts if part not in loaded]
+            if not new_parts and not evicted:
+                return self._current
+
+            current = self._current['data']
+            removed = current[PART_COLUMN].isin(evicted).to_numpy() if evicted else None
+            path = store_path(self.store_dir, parts) if self.store_dir is not None and parts else None
+            with stage('dashboard_load'):
+                if path is not None and path.exists():
+                    # * Another worker (or an earlier run) already stored exactly these parts
+                    sample_df = read_store(path)
+                    added_df = None
+                else:
+                    kept_df = current
+                    if removed is not None:
+                        # * Masking keeps the remaining rows in time order
+                        kept_df = current[~removed].reset_index(drop=True)
+                        kept_df[PART_COLUMN] = kept_df[PART_COLUMN].cat.remove_unused_categories()
+                    added_df = concat_frames([load_part(part) for part in new_parts if part.exists()] or [self._empty])
+                    sample_df = merge_in_time_order(kept_df, added_df)
+                    if path is not None:
+                        try:
+                            sample_df = read_store(write_store(sample_df, path))
+                            prune_stores(self.store_dir, keep=path)
+                            added_df = None
+                        except OSError:
+                            # * e.g. a read-only data directory: serve the rows from private memory
+                            pass
+
+            # * Without any rows kept (e.g. the first load) the cube is simply built afresh
+            cube = None
+            if len(current) > (0 if removed is None else removed.sum()):
+                with stage('dashboard_cube', rows=len(sample_df)):
+                    if added_df is None:
+                        # * Count the new rows as stored (e.g. float32 coordinates), like the rest of the cube
+                        added_df = sample_df[sample_df[PART_COLUMN].isin([part.name for part in new_parts]).to_numpy()]
+                    removed_df = current[removed] if removed is not None else self._empty
+                    cube = self._current['cube'].updated(sample_df, added_df, removed_df)
+
+            # * A single reference assignment swaps the dataset for every thread at once
+            self._current = self._snapshot(sample_df, version=self._current['version'] + 1, cube=cube)
+            self._parts = parts
+
+        if self.on_change is not None:
+            self.on_change()
+        return self._current
+
+    def info(self):
+        current = self._current
+        return {
+            'directory': str(self.directory),
+            'parts': len(self._parts),
+            'rows': len(current['data']),
+            'version': current['version'],
+        }
+
+    def _snapshot(self, sample_df, version, cube=None):
+        if cube is None:
+            with stage('dashboard_cube', rows=len(sample_df)):
+                cube = AggregateCube(sample_df, features=self.features)
+        return {
+            'data': sample_df,
+            'cube': cube,
+            'kpis': dashboard_kpis(sample_df),
+            'version': version,
+        }
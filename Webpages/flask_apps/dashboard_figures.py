@@ -0,0 +1,252 @@
+# IMPORT DEPENDENCIES
+# ----------------------------------------------------------------
+# * Analysis and manipulation libraries
+import math
+
+# * Dashboard libraries
+import plotly.express as px
+
+# * Map grid levels binned by the AggregateCube
+from dashboard_cube import MAP_GRID_LEVELS
+################################################################################
+
+
+### DASHBOARD FIGURES ###
+################################################################################
+# * Define filter labels
+FILTER_LABELS = {
+    1: 'Fraudulent',
+    0: 'Non-Fraudulent',
+    -1: 'All'
+}
+
+# * Map modes: one marker per city, or a density layer over grid cells
+MAP_MODES = {'density': 'Density', 'cities': 'Cities'}
+
+# * Initial map view
+MAP_ZOOM = 4.5
+MAP_CENTER = dict(lat=37.9931, lon=-100.9893)
+
+# * Most grid cells sent to the browser for one density map (keeps the figure JSON under ~200 KB)
+MAP_MAX_CELLS = 2500
+
+# * Roughly how many grid cells span the width of the map at any zoom
+MAP_CELLS_ACROSS = 80
+
+# * Client-side sort of the bar chart: plotly orders the categories by their totals,
+# * so toggling 'asc-desc' needs no server round trip
+SORT_BAR_CHART = """
+function(figure, ascending) {
+    if (!figure) {
+        return window.dash_clientside.no_update;
+    }
+    const layout = Object.assign({}, figure.layout);
+    layout.yaxis = Object.assign({}, layout.yaxis, {
+        categoryorder: ascending ? 'total ascending' : 'total descending'
+    });
+    return Object.assign({}, figure, {layout: layout});
+}
+"""
+
+
+# * Figure builders, one per graph; each reads pre-aggregated counts from an AggregateCube
+def bar_chart(cube, filter_item, feature, sort_order=None):
+    filter_label = FILTER_LABELS.get(filter_item, 'Unknown Filter')
+
+    # * Without a sort order the rows stay in feature order and the browser sorts the bars
+    counts = cube.feature(filter_item, feature)
+    if sort_order is not None:
+        counts = counts.sort_values(by="trans_num", ascending=sort_order)
+
+    # * Plot the bar chart 
+    return (
+        px.bar(
+        counts,
+        x="trans_num",
+        y=feature,
+        color="trans_num",
+        color_continuous_scale="Tealgrn",
+        text_auto='.2s',
+        title=f"Total Transactions by {feature} ({filter_label})"
+        )
+        .update_xaxes(
+        title =f"Total Transactions")
+        .update_layout(
+        title = {
+            'x': 0.12,
+            'y': .85
+        },
+        coloraxis_showscale=False,
+        plot_bgcolor='rgba(15, 15, 15, 0)',
+        paper_bgcolor='rgba(15, 15, 15, 0.5)'
+        )
+    )
+
+
+def age_histogram(cube, filter_item):
+    filter_label = FILTER_LABELS.get(filter_item, 'Unknown Filter')
+
+    # * Plot the histogram
+    return (
+    px.histogram(
+        cube.age(filter_item),
+        x="age",
+        y="trans_num",
+        title=f"Distribution of Transactions by Age ({filter_label})"
+        )
+        .update_traces(marker_color='rgba(49, 252, 3, 0.6)', marker_line_color='#2ad104',
+                       marker_line_width=1.5,
+                       opacity=0.6)
+        .update_layout(
+        title = {
+            "x": 0.075,
+            "y": .85
+        },
+        plot_bgcolor='rgba(15, 15, 15, 0)',
+        paper_bgcolor='rgba(15, 15, 15, 0.5)')
+    )
+
+
+def gender_pie(cube, filter_item):
+    filter_label = FILTER_LABELS.get(filter_item, 'Unknown Filter')
+
+    # * Plot the pie chart
+    return (
+        px.pie(
+        cube.gender(filter_item),
+        values="trans_num",
+        names="gender",
+        hole=0.46,
+        color_discrete_sequence=['rgba(252, 3, 3, 0.7)', 'rgba(49, 252, 3, 0.6)'])
+        .update_layout(
+        title_text=f"Transactions Breakdown ({filter_label})",
+        annotations=[dict(text='Gender %',
+                     x=0.5,
+                     y=0.5,
+                     font_size=18,
+                     showarrow=False)],
+        title = {
+            "x": 0.48
+        },
+        plot_bgcolor='rgba(15, 15, 15, 0)',
+        paper_bgcolor='rgba(15, 15, 15, 0.5)')
+    )
+
+
+def transactions_map(cube, filter_item):
+    filter_label = FILTER_LABELS.get(filter_item, 'Unknown Filter')
+
+    # * Plot the scatter_mapbox
+    return (
+        px.scatter_mapbox(
+        cube.map(filter_item),
+        lat="lat",
+        lon="long",
+        size="trans_num",
+        color="trans_num",
+        color_continuous_scale=px.colors.sequential.Jet,
+        zoom=MAP_ZOOM,
+        center=MAP_CENTER,
+        mapbox_style="carto-darkmatter",
+        title=f"Distribution of Transactions ({filter_label})",
+        hover_data=["city"],
+        hover_name="city",
+        )
+        .update_layout(
+        title={
+            "x":0.038,
+            "y":.85
+        },
+        coloraxis_colorbar = dict(
+        thicknessmode="pixels",
+        thickness=15,
+        title="Count"
+        ),
+        plot_bgcolor='rgba(15, 15, 15, 0)',
+        paper_bgcolor='rgba(15, 15, 15, 0.5)')
+    )
+
+
+def map_view(relayout_data):
+    """Zoom and (south, north, west, east) bounds from the map's relayoutData, if it has them."""
+    relayout_data = relayout_data or {}
+    zoom = relayout_data.get('mapbox.zoom', MAP_ZOOM)
+    corners = relayout_data.get('mapbox._derived', {}).get('coordinates')
+    if not corners:
+        return zoom, None
+    longs, lats = zip(*corners)
+    return zoom, (min(lats), max(lats), min(longs), max(longs))
+
+
+def map_grid(cube, filter_item, zoom=MAP_ZOOM, bounds=None, max_cells=MAP_MAX_CELLS):
+    """Pick the grid level and visible window for a density map of at most `max_cells` cells.
+
+    The level gives about MAP_CELLS_ACROSS cells across the map at `zoom`. When the whole
+    grid has too many cells, only the cells inside `bounds` are kept, with the bounds snapped
+    outwards to 16-cell tiles so small pans map to the same (cached) figure; if that is still
+    too many the level is coarsened. Returns (level, window), window being None for the
+    whole grid.
+    """
+    # * A 256 px Mercator tile spans 360 / 2 ** zoom degrees; assume a map about four tiles wide
+    target = 4 * 360 / 2 ** zoom / MAP_CELLS_ACROSS
+    level = max([0] + [level for level, size in enumerate(MAP_GRID_LEVELS) if size >= target])
+
+    while True:
+        cells = cube.density(filter_item, level)
+        window = None
+        if len(cells) > max_cells and bounds is not None:
+            tile = 16 * MAP_GRID_LEVELS[level]
+            window = (
+                math.floor(bounds[0] / tile) * tile, math.ceil(bounds[1] / tile) * tile,
+                math.floor(bounds[2] / tile) * tile, math.ceil(bounds[3] / tile) * tile,
+            )
+            cells = window_cells(cells, window)
+        if len(cells) <= max_cells or level == 0:
+            return level, window
+        level -= 1
+
+
+def window_cells(cells, window):
+    south, north, west, east = window
+    return cells[cells['lat'].between(south, north) & cells['long'].between(west, east)]
+
+
+def density_map(cube, filter_item, level, window=None, zoom=MAP_ZOOM):
+    filter_label = FILTER_LABELS.get(filter_item, 'Unknown Filter')
+    cells = cube.density(filter_item, level)
+    if window is not None:
+        cells = window_cells(cells, window)
+
+    # * Blur each cell over about its own width on screen
+    radius = min(max(round(MAP_GRID_LEVELS[level] * 256 * 2 ** zoom / 360), 4), 40)
+
+    # * Plot the density_mapbox
+    return (
+        px.density_mapbox(
+        cells.round({'lat': 4, 'long': 4}),
+        lat="lat",
+        lon="long",
+        z="trans_num",
+        radius=radius,
+        color_continuous_scale=px.colors.sequential.Jet,
+        zoom=MAP_ZOOM,
+        center=MAP_CENTER,
+        mapbox_style="carto-darkmatter",
+        title=f"Density of Transactions ({filter_label})",
+        labels={"trans_num": "Count"},
+        )
+        .update_layout(
+        title={
+            "x":0.038,
+            "y":.85
+        },
+        coloraxis_colorbar = dict(
+        thicknessmode="pixels",
+        thickness=15,
+        title="Count"
+        ),
+        # * Keep the user's pan and zoom when the figure is swapped for another level
+        uirevision="map",
+        plot_bgcolor='rgba(15, 15, 15, 0)',
+        paper_bgcolor='rgba(15, 15, 15, 0.5)')
+    )
@@ -0,0 +1,55 @@
+# IMPORT DEPENDENCIES
+# ----------------------------------------------------------------
+# * Concurrency libraries
+import threading
+################################################################################
+
+
+### LAZY DASHBOARD ###
+################################################################################
+class LazyDashboard:
+    """WSGI middleware serving the Dash dashboard under `prefix`, built on first use.
+
+    Importing Dash and Plotly and loading every stored result takes seconds, so the Flask
+    app starts without them: the first request under `prefix` calls `build()` (which returns
+    {'app', 'data', 'figure_cache'}, see dashboard_app.py) and every later one is passed to
+    the Dash app's server. `warm_up()` builds it on a background thread instead. Every other
+    path goes straight to `app`.
+    """
+
+    def __init__(self, app, build, prefix='/dashboard/'):
+        self.app = app
+        self.build = build
+        self.prefix = prefix
+        self._dashboard = None
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        if environ.get('PATH_INFO', '').startswith(self.prefix):
+            return self.load()['app'].server(environ, start_response)
+        return self.app(environ, start_response)
+
+    @property
+    def loaded(self):
+        return self._dashboard is not None
+
+    def load(self):
+        """Return the dashboard, building it first if nobody has yet."""
+        if self._dashboard is None:
+            with self._lock:
+                if self._dashboard is None:
+                    self._dashboard = self.build()
+        return self._dashboard
+
+    def warm_up(self):
+        threading.Thread(target=self.load, name='dashboard-warm-up', daemon=True).start()
+
+    def refresh(self):
+        """Pick up new results, if the dashboard has been built (otherwise it reads them all when it is)."""
+        if self._dashboard is not None:
+            self._dashboard['data'].refresh()
+
+    def stats(self):
+        if self._dashboard is None:
+            return {'loaded': False}
+        return {'loaded': True, **self._dashboard['figure_cache'].stats()}
@@ -0,0 +1,166 @@
+# IMPORT DEPENDENCIES
+# ----------------------------------------------------------------
+# * Directory libraries
+from pathlib import Path
+
+# * Analysis and manipulation libraries
+import pandas as pd
+import numpy as np
+
+# * Persistence and concurrency libraries
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# * Preprocessing stages
+from preprocessing import prev_merch_distance_km
+################################################################################
+
+
+### PER-CARD FEATURE STORE ###
+################################################################################
+# * Rolling windows (seconds) for the per-card transaction counts and amount sums
+WINDOWS = {'1h': 3600, '24h': 86400, '7d': 7 * 86400}
+
+# * Events older than the longest window (relative to a card's latest event) are pruned
+RETENTION = max(WINDOWS.values())
+
+# * SQLite file holding the retained events, next to model.pkl
+FEATURE_STORE_PATH = Path(__file__).resolve().parent / 'card_features.sqlite'
+
+EVENT_COLUMNS = ['cc_num', 'unix_time', 'amt', 'merch_lat', 'merch_long', 'trans_num']
+
+
+def velocity_features(events):
+    """Compute per-card velocity and previous-merchant features for events sorted by ('cc_num', 'unix_time').
+
+    Counts and amount sums cover (t - window, t] and include the transaction itself.
+    Card boundaries are folded into a single sorted int64 key, so every window is one
+    `searchsorted` over the whole frame instead of a groupby.
+    """
+    card_codes = pd.factorize(events['cc_num'].to_numpy())[0].astype(np.int64)
+    times = events['unix_time'].to_numpy(dtype=np.int64)
+    amounts = events['amt'].to_numpy(dtype=np.float64)
+
+    key = (card_codes << 32) + times
+    positions = np.arange(len(events))
+    amount_sums = np.concatenate([[0.0], np.cumsum(amounts)])
+
+    features = pd.DataFrame(index=events.index)
+    for name, window in WINDOWS.items():
+        start = np.searchsorted(key, key - window, side='right')
+        features[f'count_{name}'] = positions + 1 - start
+        features[f'amt_{name}'] = amount_sums[positions + 1] - amount_sums[start]
+
+    # * Time since, and distance from the merchant of, the card's previous transaction
+    first = np.r_[True, card_codes[1:] != card_codes[:-1]] if len(events) else np.zeros(0, dtype=bool)
+    previous = np.maximum(positions - 1, 0)
+    features['seconds_since_last'] = np.where(first, np.nan, times - times[previous])
+    features['prev_merch_distance_km'] = prev_merch_distance_km(card_codes, events['merch_lat'], events['merch_long'])
+
+    return features
+
+
+class CardFeatureStore:
+    """Incremental per-`cc_num` state persisted in SQLite.
+
+    Only the events inside the longest window are kept for each card, so updating with a
+    batch reads and writes the batch's cards only, however long the history grows.
+    Batches are expected in roughly chronological order; an event older than a card's
+    retained history only sees the retained part of its windows.
+
+    Events are keyed by 'trans_num', so rescoring an upload (e.g. after a model or
+    threshold change) stores each transaction once and gives it the same features as before.
+    """
+
+    def __init__(self, path=FEATURE_STORE_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS events (cc_num INTEGER, unix_time INTEGER, amt REAL, merch_lat REAL, merch_long REAL, trans_num TEXT)")
+            # * Stores created before events were keyed get the column; their old events keep a NULL key
+            if 'trans_num' not in [column[1] for column in conn.execute("PRAGMA table_info(events)")]:
+                conn.execute("ALTER TABLE events ADD COLUMN trans_num TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS events_card_time ON events (cc_num, unix_time)")
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS events_trans_num ON events (trans_num)")
+
+    def update(self, sample_df):
+        """Add uploaded transactions and return their velocity features (aligned on sample_df's index)."""
+        batch = pd.DataFrame({
+            'cc_num': sample_df['cc_num'].to_numpy(dtype=np.int64),
+            'unix_time': (pd.to_datetime(sample_df['trans_date_trans_time'], format='%Y-%m-%d %H:%M:%S') - pd.Timestamp("1970-01-01")) // pd.Timedelta('1s'),
+            'amt': sample_df['amt'].to_numpy(dtype=np.float64),
+            'merch_lat': sample_df['merch_lat'].to_numpy(dtype=np.float64),
+            'merch_long': sample_df['merch_long'].to_numpy(dtype=np.float64),
+            'trans_num': sample_df['trans_num'].to_numpy(dtype=object) if 'trans_num' in sample_df.columns else None,
+        }, index=sample_df.index)
+
+        with self._lock, self._connect() as conn:
+            history = self._history(conn, batch['cc_num'].unique())
+
+            # * Transactions already stored (a rescored upload) are counted once, as this batch's events
+            history = history[~history['trans_num'].isin(batch['trans_num'].dropna())]
+
+            # * History first so it sorts ahead of batch events with the same timestamp
+            events = batch.assign(row=np.arange(len(batch)))
+            if len(history):
+                events = pd.concat([history.assign(row=-1), events], ignore_index=True)
+            events = events.sort_values(['cc_num', 'unix_time'], kind='mergesort').reset_index(drop=True)
+            features = velocity_features(events)
+
+            # * Drop the batch cards' events that fell out of the longest window, then append the batch
+            cutoffs = events.groupby('cc_num', sort=False)['unix_time'].max() - RETENTION
+            conn.execute("DELETE FROM batch_cards")
+            conn.executemany("INSERT INTO batch_cards VALUES (?, ?)", zip(cutoffs.index.tolist(), cutoffs.tolist()))
+            conn.execute(
+                "DELETE FROM events WHERE cc_num IN (SELECT cc_num FROM batch_cards) AND unix_time <= "
+                "(SELECT cutoff FROM batch_cards WHERE batch_cards.cc_num = events.cc_num)"
+            )
+            retained = batch['unix_time'].to_numpy() > cutoffs.loc[batch['cc_num']].to_numpy()
+            conn.executemany(
+                f"INSERT OR IGNORE INTO events ({', '.join(EVENT_COLUMNS)}) VALUES ({', '.join('?' * len(EVENT_COLUMNS))})",
+                batch.loc[retained, EVENT_COLUMNS].itertuples(index=False, name=None),
+            )
+
+        is_batch = events['row'].to_numpy() >= 0
+        features = features[is_batch].set_axis(events.loc[is_batch, 'row'].to_numpy())
+        return features.sort_index().set_axis(sample_df.index)
+
+    def card_state(self, cc_num):
+        """Current state of one card: last transaction, last merchant location and window totals."""
+        with self._connect() as conn:
+            history = pd.read_sql_query(
+                "SELECT * FROM events WHERE cc_num = ? ORDER BY unix_time", conn, params=(int(cc_num),)
+            )
+        if history.empty:
+            return None
+
+        latest = history.iloc[-1]
+        state = {
+            'cc_num': int(cc_num),
+            'last_unix_time': int(latest['unix_time']),
+            'last_merch_lat': float(latest['merch_lat']),
+            'last_merch_long': float(latest['merch_long']),
+        }
+        for name, window in WINDOWS.items():
+            in_window = history['unix_time'] > latest['unix_time'] - window
+            state[f'count_{name}'] = int(in_window.sum())
+            state[f'amt_{name}'] = float(history.loc[in_window, 'amt'].sum())
+        return state
+
+    def _history(self, conn, cards):
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS batch_cards (cc_num INTEGER PRIMARY KEY, cutoff INTEGER)")
+        conn.execute("DELETE FROM batch_cards")
+        conn.executemany("INSERT INTO batch_cards VALUES (?, NULL)", ((int(card),) for card in cards))
+        return pd.read_sql_query(
+            "SELECT events.* FROM events JOIN batch_cards USING (cc_num)", conn
+        ).astype({'cc_num': np.int64, 'unix_time': np.int64})
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
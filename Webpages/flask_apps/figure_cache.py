@@ -0,0 +1,65 @@
+# IMPORT DEPENDENCIES
+# ----------------------------------------------------------------
+# * Concurrency libraries
+import threading
+from collections import OrderedDict
+################################################################################
+
+
+### DASHBOARD FIGURE CACHE ###
+################################################################################
+class FigureCache:
+    """Bounded LRU cache of serialized Plotly figures for the Dash callbacks.
+
+    Keys are prefixed with the dataset version, and `invalidate()` (called when /upload
+    writes a new processed data file) bumps the version and drops every entry, so a figure
+    built from the previous dataset is never served again.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        """Return the cached figure for `key`, building (and serializing) it on a miss."""
+        with self._lock:
+            version = self.version
+            entry = self._entries.get((version,) + key)
+            if entry is not None:
+                self._entries.move_to_end((version,) + key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # * Build outside the lock so other figures are not blocked behind it
+        figure = build()
+        entry = figure.to_dict() if hasattr(figure, 'to_dict') else figure
+
+        with self._lock:
+            if version == self.version:
+                self._entries[(version,) + key] = entry
+                self._entries.move_to_end((version,) + key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'dataset_version': self.version,
+                'entries': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+            }
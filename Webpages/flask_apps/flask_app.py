@@ -1,29 +1,36 @@
 # IMPORT DEPENDENCIES
 # ----------------------------------------------------------------
 # * Directory libraries
+import os
 from pathlib import Path 
+import hashlib
+import time
 
 # * Analysis and manipulation libraries
 import pandas as pd
 import numpy as np 
 import random
-from datetime import datetime, timedelta
-
-# * ML libraries
-from sklearn.preprocessing import StandardScaler 
-import pickle
+from datetime import datetime
+
+# * Preprocessing stages
+from preprocessing import PREPROCESSOR_PATH, fit_preprocessor, load_preprocessor, merchant_distance_km, seed_fraud_labels
+from model_registry import ModelRegistry
+from scoring import CHUNK_SIZE, FRAUD_THRESHOLD, flag_fraud, format_output, predict_fraud_proba, score_csv_stream, top_k_risk
+from tree_evaluator import record_scorer
+from feature_store import FEATURE_STORE_PATH, CardFeatureStore
+from processed_data import PROCESSED_DATA_PATH, write_processed
+from result_store import ResultStore, scorer_version
+from results_table import PAGE_SIZE, REVIEW_SIZE, result_page, review_queue
+from jobs import JobManager, JobQueueFull
+from batch_formats import UnsupportedFormat, batch_format, iter_body, read_batch, scored_batch, write_batch
+from metrics import METRICS, RATE_BUCKETS, Counter, Gauge, Histogram, profile_call, stage
 
 # * Application libraries 
-from flask import Flask, render_template, request, redirect, session, url_for
+from flask import Flask, Response, render_template, request, redirect, session, url_for, jsonify
 # from werkzeug.middleware.dispatcher import DispatcherMiddleware
 
-# * Dashboard libraries
-import plotly.express as px 
-from dash import Dash, html, dcc
-from dash.dependencies import Output, Input
-from dash.exceptions import PreventUpdate
-from dash_bootstrap_templates import load_figure_template
-import dash_bootstrap_components as dbc
+# * Dashboard (Dash, Plotly and the stored results are only loaded when /dashboard/ is first used)
+from dashboard_mount import LazyDashboard
 ################################################################################
 
 
@@ -32,6 +39,69 @@ import dash_bootstrap_components as dbc
 # * Instantiate the flask application
 server = Flask(__name__)
 
+# * Uploads at least this large are scored in chunks of STREAM_CHUNK_ROWS rows
+server.config['STREAM_UPLOAD_BYTES'] = 50 * 1024 * 1024
+server.config['STREAM_CHUNK_ROWS'] = CHUNK_SIZE
+
+# * Background scoring: threads for regular uploads, separate threads for large ones (so big
+# * files cannot hold up everyone else), and how many jobs may wait before /upload returns 503
+server.config['JOB_WORKERS'] = 2
+server.config['LARGE_JOB_WORKERS'] = 1
+server.config['MAX_PENDING_JOBS'] = 16
+
+# * Scored results, one per distinct upload and model, kept under DATA_DIR until they are
+# * older than RESULT_MAX_AGE seconds or the newest RESULT_MAX_COUNT / RESULT_MAX_BYTES are reached
+server.config['DATA_DIR'] = os.environ.get('FRAUD_DATA_DIR', str(PROCESSED_DATA_PATH))
+server.config['RESULT_MAX_COUNT'] = 500
+server.config['RESULT_MAX_BYTES'] = 5 * 2**30
+server.config['RESULT_MAX_AGE'] = 30 * 86400
+
+# * Per-card velocity state (SQLite), next to this file unless FRAUD_FEATURE_STORE names another file
+server.config['FEATURE_STORE_PATH'] = os.environ.get('FRAUD_FEATURE_STORE', str(FEATURE_STORE_PATH))
+
+# * Transactions are flagged when their fraud probability is above FRAUD_THRESHOLD (env
+# * FRAUD_THRESHOLD; 0.5 flags what model.predict does). /api/v1/score takes ?threshold= per request
+server.config['FRAUD_THRESHOLD'] = float(os.environ.get('FRAUD_THRESHOLD', FRAUD_THRESHOLD))
+
+# * Set FRAUD_PROFILE_DIR to dump a cProfile of every scoring job slower than PROFILE_MIN_SECONDS
+# * (or of any upload posted with ?profile=1) into that directory; off by default
+server.config['PROFILE_DIR'] = os.environ.get('FRAUD_PROFILE_DIR')
+server.config['PROFILE_MIN_SECONDS'] = 10.0
+
+# * Load the fitted preprocessor once (None until it has been fitted offline)
+PREPROCESSOR = load_preprocessor()
+PREPROCESSOR_VERSION = hashlib.sha256(PREPROCESSOR_PATH.read_bytes()).hexdigest()[:12] if PREPROCESSOR is not None else 'per-upload'
+
+# * Load model.pkl once; it is reloaded only when the file changes
+MODEL_REGISTRY = ModelRegistry()
+
+# * Per-card velocity state, updated by every upload
+FEATURE_STORE = CardFeatureStore(server.config['FEATURE_STORE_PATH'])
+
+# * Scored results addressed by upload content and scorer version
+RESULT_STORE = ResultStore(server.config['DATA_DIR'], max_results=server.config['RESULT_MAX_COUNT'],
+                           max_bytes=server.config['RESULT_MAX_BYTES'], max_age=server.config['RESULT_MAX_AGE'])
+
+# * Upload scoring jobs, polled through /jobs/<job_id>
+JOBS = JobManager(workers=server.config['JOB_WORKERS'], large_workers=server.config['LARGE_JOB_WORKERS'],
+                  max_pending=server.config['MAX_PENDING_JOBS'])
+
+# * Served at /metrics along with the per-stage timings (see metrics.py)
+ROWS_SCORED = METRICS.register(Counter('fraud_rows_scored_total', 'Transactions scored by upload jobs.', ['path']))
+SCORING_RATE = METRICS.register(Histogram('fraud_upload_rows_per_second', 'Rows scored per second by each upload job.', RATE_BUCKETS, ['path']))
+METRICS.register(Gauge('fraud_model_loads_total', 'Times model.pkl has been loaded.', lambda: MODEL_REGISTRY.load_count, type='counter'))
+METRICS.register(Gauge('fraud_jobs', 'Upload jobs currently known, by state.', JOBS.stats, ['state']))
+
+# * Update the per-card state and attach the geo and velocity features (window counts and amounts,
+# * time since and distance from the card's previous transaction) to scored transactions, which
+# * stores them with the result
+def record_card_features(sample_df):
+    with stage('card_features', rows=len(sample_df)):
+        card_features = FEATURE_STORE.update(sample_df)
+        sample_df['merch_distance_km'] = merchant_distance_km(sample_df)
+        sample_df[list(card_features.columns)] = card_features
+    return sample_df
+
 # * Configure the '/' route
 @server.route('/')
 def index():
@@ -42,462 +112,294 @@ def index():
 def transactions():
     return render_template('transactions.html')
 
-# * Configure the '/upload' route
+# * Configure the '/model' route (loaded model version and load time)
+@server.route('/model')
+def model_info():
+    return jsonify(MODEL_REGISTRY.info())
+
+# * Configure the '/api/v1/score' route (JSON records, CSV, Arrow IPC or Parquet in and out)
+@server.route('/api/v1/score', methods=['POST'])
+def score_api():
+    try:
+        fmt = batch_format(request.content_type)
+    except UnsupportedFormat as e:
+        return jsonify(error=str(e)), 415
+
+    # * ?threshold= flags above another probability; ?top_k= returns only the riskiest rows, ranked
+    threshold = request.args.get('threshold', server.config['FRAUD_THRESHOLD'], type=float)
+    top_k = request.args.get('top_k', type=int)
+    if not 0.0 <= threshold <= 1.0:
+        return jsonify(error="threshold must be between 0 and 1"), 400
+
+    try:
+        sample_df = read_batch(request.get_data(), fmt)
+        if sample_df.empty:
+            return jsonify(error="No transactions to score"), 400
+
+        preprocessor = PREPROCESSOR
+        if preprocessor is None:
+            preprocessor = fit_preprocessor(seed_fraud_labels(sample_df))
+
+        model, model_version = MODEL_REGISTRY.current()
+        is_fraud, fraud_probability = predict_fraud_proba(sample_df, preprocessor, model, threshold)
+    except Exception as e:
+        return jsonify(error=f"An error occurred: {str(e)}"), 400
+
+    result_df = scored_batch(sample_df, is_fraud, fraud_probability)
+    if top_k is not None:
+        # * Riskiest first, with each row's position in the batch
+        ranked = top_k_risk(fraud_probability, top_k)
+        result_df = result_df.take(ranked).reset_index(drop=True)
+        result_df.insert(0, 'row', ranked)
+    body, mimetype = write_batch(result_df, fmt)
+    headers = {'X-Model-Version': model_version}
+    if not isinstance(body, str):
+        # * An Arrow or Parquet buffer: served in blocks straight from it rather than copied whole
+        headers['Content-Length'] = str(body.size)
+        body = iter_body(body)
+    return Response(body, mimetype=mimetype, headers=headers)
+
+# * Configure the '/api/v1/score/transaction' route (one JSON transaction, compiled tree evaluator)
+@server.route('/api/v1/score/transaction', methods=['POST'])
+def score_transaction():
+    record = request.get_json(silent=True)
+    if not isinstance(record, dict):
+        return jsonify(error="Send one transaction as a JSON object"), 400
+
+    try:
+        if PREPROCESSOR is None:
+            # * Without a fitted preprocessor there is nothing to compile; score it as a batch of one
+            sample_df = pd.DataFrame([record])
+            is_fraud, fraud_probability = predict_fraud_proba(sample_df, fit_preprocessor(seed_fraud_labels(sample_df)), MODEL_REGISTRY.get())
+            fraud_probability = float(fraud_probability[0])
+        else:
+            scorer = MODEL_REGISTRY.derived('record_scorer', lambda model: record_scorer(model, PREPROCESSOR))
+            _, fraud_probability = scorer(record)
+        is_fraud = int(flag_fraud(fraud_probability, server.config['FRAUD_THRESHOLD']))
+    except Exception as e:
+        return jsonify(error=f"An error occurred: {str(e)}"), 400
+
+    return jsonify(trans_num=record.get('trans_num'), is_fraud=is_fraud, fraud_probability=fraud_probability)
+
+# * Configure the '/api/v1/cards/<cc_num>' route (per-card velocity state built from uploads)
+@server.route('/api/v1/cards/<int:cc_num>')
+def card_features(cc_num):
+    state = FEATURE_STORE.card_state(cc_num)
+    if state is None:
+        return jsonify(error=f"No transactions stored for card {cc_num}"), 404
+    return jsonify(state)
+
+# * Configure the '/api/v1/results/<result_id>' route (one page of an upload's scored transactions)
+@server.route('/api/v1/results/<result_id>')
+def results(result_id):
+    path = RESULT_STORE.lookup(result_id)
+    if path is None:
+        return jsonify(error=f"No results stored for {result_id}"), 404
+
+    is_fraud = request.args.get('is_fraud')
+    try:
+        page = result_page(
+            path,
+            page=request.args.get('page', 1, type=int),
+            page_size=request.args.get('page_size', PAGE_SIZE, type=int),
+            sort=request.args.get('sort', 'is_fraud'),
+            ascending=request.args.get('order', 'desc') == 'asc',
+            is_fraud=int(is_fraud) if is_fraud in ('0', '1') else None,
+            merchant=request.args.get('merchant'),
+        )
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    return jsonify(page)
+
+# * Configure the '/api/v1/results/<result_id>/review' route (an upload's riskiest transactions, ranked)
+@server.route('/api/v1/results/<result_id>/review')
+def review(result_id):
+    path = RESULT_STORE.lookup(result_id)
+    if path is None:
+        return jsonify(error=f"No results stored for {result_id}"), 404
+
+    try:
+        queue = review_queue(path, k=request.args.get('k', REVIEW_SIZE, type=int))
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    return jsonify(queue)
+
+# * Configure the '/metrics' route (Prometheus text format)
+@server.route('/metrics')
+def metrics():
+    return Response(METRICS.render(), mimetype='text/plain; version=0.0.4')
+
+# * Configure the '/dashboard-cache' route (figure cache hit ratio)
+@server.route('/dashboard-cache')
+def dashboard_cache():
+    return jsonify(DASHBOARD.stats())
+
+# * Score one saved upload in the background with `pickled_model` (the model whose version is in
+# * the result id); `update` reports the job's progress
+def score_upload(upload_path, output_path, large, update, pickled_model):
+    started = time.perf_counter()
+    try:
+        # Large uploads are scored in chunks (needs the fitted preprocessor), so the whole file
+        # is never held in memory; progress is reported after every chunk.
+        if PREPROCESSOR is not None and large:
+            size = max(upload_path.stat().st_size, 1)
+            counts = {'chunks': 0, 'rows': 0}
+            with open(upload_path, 'rb') as source:
+                def on_chunk(chunk):
+                    record_card_features(chunk)
+                    counts['chunks'] += 1
+                    counts['rows'] += len(chunk)
+                    update(progress=round(min(source.tell() / size, 0.99), 4), **counts)
+
+                summary = score_csv_stream(source, output_path, PREPROCESSOR, pickled_model,
+                                           chunksize=server.config['STREAM_CHUNK_ROWS'], on_chunk=on_chunk,
+                                           threshold=server.config['FRAUD_THRESHOLD'])
+            rows, flagged = summary['rows'], summary['flagged']
+            path = 'stream'
+        else:
+            # Read the CSV file using pandas
+            with stage('read_csv'):
+                sample_df = pd.read_csv(upload_path)
+            update(progress=0.25, chunks=0, rows=len(sample_df))
+
+            ### SCALING THE DATASET  ###
+            ################################################################
+            # The scaler statistics and target encodings are fitted offline (see preprocessing.py)
+            # and only applied here. Until preprocessor.pkl exists, fit them on this upload with
+            # 'is_fraud' seeded from the 7-day gaps, as this route always did.
+            preprocessor = PREPROCESSOR
+            if preprocessor is None:
+                with stage('seed_labels', rows=len(sample_df)):
+                    seeded_df = seed_fraud_labels(sample_df)
+                with stage('fit_preprocessor', rows=len(sample_df)):
+                    preprocessor = fit_preprocessor(seeded_df)
+
+
+            ### USE THE PICKEL MODEL TO PREDICT FRAUDULENT TRANSACTIONS ###
+            ################################################################
+            # * predictions = Is_fraud, in the uploaded row order, flagged above FRAUD_THRESHOLD;
+            # * the probabilities are stored too, for the ranked review queue
+            sample_df['is_fraud'], sample_df['fraud_probability'] = predict_fraud_proba(
+                sample_df, preprocessor, pickled_model, server.config['FRAUD_THRESHOLD'])
+            update(progress=0.5)
+
+            # * Add the transactions to the per-card state and attach the geo features
+            sample_df = record_card_features(sample_df)
+
+            # * Tidy merchant and category labels
+            with stage('format', rows=len(sample_df)):
+                sample_df = format_output(sample_df)
+
+            with stage('write', rows=len(sample_df)):
+                write_processed(sample_df, output_path)
+            rows, flagged = len(sample_df), int((sample_df['is_fraud'] == 1).sum())
+            path = 'memory'
+            update(progress=0.9, chunks=1)
+
+        ROWS_SCORED.inc(rows, path=path)
+        SCORING_RATE.observe(rows / (time.perf_counter() - started), path=path)
+        return {'rows': rows, 'flagged': flagged, 'result_id': output_path.stem}
+    finally:
+        upload_path.unlink()
+
+# * Once a scoring job is done: drop old results, then add the new part to the dashboard (this
+# * also drops the cached figures). Neither counts towards the job, and an error in either is
+# * logged rather than failing a result that is already stored.
+def publish_result(result):
+    try:
+        RESULT_STORE.evict(keep={result['result_id']})
+    except Exception:
+        server.logger.exception("Evicting old results after %s failed", result['result_id'])
+    try:
+        DASHBOARD.refresh()
+    except Exception:
+        server.logger.exception("Refreshing the dashboard after %s failed", result['result_id'])
+
+# * Configure the '/upload' route (queues a scoring job and returns straight away)
 @server.route('/upload', methods=['POST'])
 def upload():
     if request.method == 'POST':
         file = request.files['file']
         if file:
             try:
-                # Save the uploaded file
-                file.save('uploaded_file.csv')
-
-                # Read the CSV file using pandas
-                sample_df = pd.read_csv('uploaded_file.csv')
-
-                ### SCALING THE DATASET  ###
-                ################################################################
-                # Create a copy of the sample dataframe -
-                fraud_df = sample_df.copy()
-                
-                # Drop the cc_num and trans_num columns as credit numbers are randomly generated by the banks and 
-                # have no link to whether fraud will be committed
-                fraud_df.drop(['cc_num','trans_num'], axis=1, inplace=True)
-
-                # Convert 'trans_date_trans_time' from object to date time format
-                fraud_df['trans_date_trans_time'] = pd.to_datetime(fraud_df['trans_date_trans_time'], format='%Y-%m-%d %H:%M:%S')
-                
-                # Sort transaction date and time in ascending order
-                fraud_df = fraud_df.sort_values(by='trans_date_trans_time', ascending=True)
-
-                # Number of rows to generate based on rows in sample file uploaded
-                num_rows = len(fraud_df)
-
-                # Initialize 'is_fraud' column with 0
-                fraud_df['is_fraud'] = 0
-
-                # Set 'is_fraud' to 1 for the first transaction
-                fraud_df.loc[0, 'is_fraud'] = 1
-
-                # Set 'is_fraud' to 1 for transactions every 7 days
-                for i in range(1, len(fraud_df)):
-                    time_difference = fraud_df['trans_date_trans_time'].iloc[i] - fraud_df['trans_date_trans_time'].iloc[i - 1]
-                    if time_difference >= timedelta(days=7):
-                        fraud_df.loc[i, 'is_fraud'] = 1
-
-                fraud_df.reset_index(drop=True, inplace=True)
-
-                # Convert the 'trans_date_trans_time' column to datetime objects
-                fraud_df['trans_date_trans_time'] = pd.to_datetime(fraud_df['trans_date_trans_time'], format='%Y-%m-%d %H:%M:%S')
-
-                # Convert the 'trans_date_trans_time' column to Unix timestamps
-                fraud_df['trans_date_trans_time'] = (fraud_df['trans_date_trans_time'] - pd.Timestamp("1970-01-01")) // pd.Timedelta('1s')
-
-                # Convert the 'dob' column to datetime objects
-                fraud_df['dob'] = pd.to_datetime(fraud_df['dob'], format='%Y-%m-%d')
-
-                # Convert the 'dob' column to Unix timestamps
-                fraud_df['dob'] = (fraud_df['dob'] - pd.Timestamp("1970-01-01")) // pd.Timedelta('1s')
-
-                # Scale the numeric columns.
-                # Scaling the data is necessary to ensure that features with different units or magnitudes have an equal 
-                # influence on machine learning algorithms and to enable efficient convergence.
-
-                # Define the columns you want to scale (assuming they are all numeric)
-                columns_to_scale = ['trans_date_trans_time', 'amt','zip','lat','long','city_pop','dob','unix_time','merch_lat','merch_long']
-
-                # Initialize the StandardScaler
-                scaler = StandardScaler()
-
-                # Fit the scaler on your data and transform the specified columns
-                fraud_df[columns_to_scale] = scaler.fit_transform(fraud_df[columns_to_scale])
-
-                # Implement target encoding for each feature and the 'is_fraud' target variable
-                # Calculate the mean 'is_fraud' for each 'merchant'
-                target_mean = fraud_df.groupby('merchant')['is_fraud'].mean()
-                # Replace merchant column with the target encoding
-                fraud_df['merchant'] = fraud_df['merchant'].map(target_mean)
-
-
-                # Calculate the mean 'is_fraud' for each 'job'
-                target_mean = fraud_df.groupby('category')['is_fraud'].mean()
-                # Replace category column with the target encoding
-                fraud_df['category'] = fraud_df['category'].map(target_mean)
-
-
-                # Calculate the mean 'is_fraud' for each 'first'
-                target_mean = fraud_df.groupby('first')['is_fraud'].mean()
-                # Replace first column with the target encoding
-                fraud_df['first'] = fraud_df['first'].map(target_mean)
-
-
-                # Calculate the mean 'is_fraud' for each 'last'
-                target_mean = fraud_df.groupby('last')['is_fraud'].mean()
-                # Replace last column with the target encoding
-                fraud_df['last'] = fraud_df['last'].map(target_mean)
-
-
-                # Calculate the mean 'is_fraud' for each 'street'
-                target_mean = fraud_df.groupby('street')['is_fraud'].mean()
-                # Replace street column with the target encoding
-                fraud_df['street'] = fraud_df['street'].map(target_mean)
-
-
-                # Calculate the mean 'is_fraud' for each 'city'
-                target_mean = fraud_df.groupby('city')['is_fraud'].mean()
-                # Replace city column with the target encoding
-                fraud_df['city'] = fraud_df['city'].map(target_mean)
-
-
-                # Calculate the mean 'is_fraud' for each 'state'
-                target_mean = fraud_df.groupby('state')['is_fraud'].mean()
-                # Replace state column with the target encoding
-                fraud_df['state'] = fraud_df['state'].map(target_mean)
-
-
-                # Calculate the mean 'is_fraud' for each 'job'
-                target_mean = fraud_df.groupby('job')['is_fraud'].mean()
-                # Replace job column with the target encoding
-                fraud_df['job'] = fraud_df['job'].map(target_mean)
-
-
-                # Replace "M" with 1 and "F" with 0 in the "gender" column
-                fraud_df['gender'] = fraud_df['gender'].replace({'M': 1, 'F': 0})
-
-                # Drop is_fraud column
-                fraud_df.drop(['is_fraud'], axis=1, inplace=True)
-                
-                
-                ### USE THE PICKEL MODEL TO PREDICT FRAUDULENT TRANSACTIONS ###
-                ################################################################
-                # * Load the pickeled model
-                pickled_model = pickle.load(open('model.pkl', 'rb'))
-                
-                # * predictions = Is_fraud
-                is_fraud = pickled_model.predict(fraud_df)
-
-                # * Create a pd.Series form is fraud 
-                is_fraud = pd.Series(is_fraud, name="is_fraud")
-
-                # * DataFrame with is_fraud (predictions)
-                sample_df['is_fraud'] = is_fraud
-                sample_df['merchant'] = sample_df['merchant'].str.replace("fraud_", "")
-                sample_df['category'] = sample_df['category'].str.replace("_", " ")
-                sample_df['category'] = sample_df['category'].str.title()
-
-
-                sample_df.to_csv("processed_data.csv", index=False)
-                
-                
-                ### GET LIST OF TRANSACTIONS TO VIEW ###
-                ################################################################
-                # Extract the columns you need (change 'desired_column' to your desired column name)
-                selected_column = sample_df[['trans_date_trans_time', 'cc_num', 'merchant','category', 'amt', 'trans_num', 'is_fraud']]
-
-                def format_fraud_column(val):
-                    if val == 0:
-                        return '<span style="font-size: 25px; text-align: right; color: green;">&#x2713</span>'  #insert green tick if not fraud
-                    elif val == 1:
-                        return '<span style="font-size: 25px; text-align: right; color: orange;">&#10071</span>'  #insert orange exclamation if potentially fraudulent
-                    else:
-                        return val
-
-                # Sort the 'is_fraud' column in descending order
-                selected_column = selected_column.sort_values(by='is_fraud', ascending=False)
-
-                # Apply the formatting function to the 'is_fraud' column
-                selected_column['is_fraud'] = selected_column['is_fraud'].apply(format_fraud_column)
-
-                # Convert the selected data to an HTML table
-                table_html = selected_column.to_html(index=False, escape=False)
-
-                # Return the HTML content as the response
-                return render_template('/transactions.html', table_data=table_html)
+                # * Save the upload under its own name, hashing it on the way; the job deletes it when done
+                with stage('save'):
+                    upload_path, upload_digest = RESULT_STORE.receive(file.stream)
+                # * The result id and the job use the same model, even if model.pkl changes meanwhile
+                model, model_version = MODEL_REGISTRY.current()
+                scorer = scorer_version(model_version, PREPROCESSOR_VERSION, server.config['FRAUD_THRESHOLD'])
+                result_id = RESULT_STORE.result_id(upload_digest, scorer)
+
+                if RESULT_STORE.lookup(result_id) is not None:
+                    # * Same file, same model: serve the stored result without scoring it again
+                    upload_path.unlink()
+                    job = JOBS.record({**RESULT_STORE.summary(result_id), 'result_id': result_id, 'cached': True}, key=result_id)
+                else:
+                    # * Identical uploads arriving together share one job
+                    large = upload_path.stat().st_size >= server.config['STREAM_UPLOAD_BYTES']
+                    output_path = RESULT_STORE.path(result_id)
+                    run = lambda update: score_upload(upload_path, output_path, large, update, model)
+                    if server.config['PROFILE_DIR']:
+                        run = profiled(run, result_id, force=request.args.get('profile') == '1')
+                    try:
+                        job = JOBS.submit(run, large=large, key=result_id, after=publish_result)
+                    except JobQueueFull as e:
+                        upload_path.unlink()
+                        return jsonify(error=str(e)), 503
+                    if job.get('shared'):
+                        upload_path.unlink()
+
+                # * API clients get the job to poll; the page polls it and then loads the results table
+                if request.accept_mimetypes.best == 'application/json':
+                    return jsonify(job_response(job)), 202, {'Location': url_for('job_status', job_id=job['id'])}
+                return render_template('/transactions.html', job_id=job['id'])
             
             except Exception as e:
                 return f"An error occurred: {str(e)}"
 
+# * Wrap a scoring job so a slow (or forced) run leaves a cProfile dump in PROFILE_DIR
+def profiled(run, result_id, force=False):
+    profile_dir = Path(server.config['PROFILE_DIR'])
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    dump_path = profile_dir / f"{result_id}-{datetime.now():%Y%m%dT%H%M%S}.prof"
+    min_seconds = 0.0 if force else server.config['PROFILE_MIN_SECONDS']
+    return lambda update: profile_call(lambda: run(update), dump_path, min_seconds)
+
+# * A job's state with links to itself and, once done, to its results
+def job_response(job):
+    job['links'] = {'self': url_for('job_status', job_id=job['id'])}
+    if job.get('result_id'):
+        job['links']['results'] = url_for('results', result_id=job['result_id'])
+        job['links']['review'] = url_for('review', result_id=job['result_id'])
+    return job
+
+# * Configure the '/jobs/<job_id>' route (progress of a queued upload)
+@server.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify(error=f"No job {job_id}"), 404
+    return jsonify(job_response(job))
+
 
 ### DASH APP ###
 ########################################################################
-# * Loading the dataset
-path = "/Users/galbeeir/Desktop/git/Project 4 - Fradulent Transactions/fraudulent_transactions/Webpages/flask_apps/processed_data.csv"
-
-sample_df = pd.read_csv(path, parse_dates=["trans_date_trans_time", "dob"],infer_datetime_format=True)
-
-columns_to_drop = ["cc_num", "unix_time", "zip"]
-sample_df = sample_df.drop(columns_to_drop, axis=1)
-
-# * Formatting category & merchant
-sample_df['merchant'] = sample_df['merchant'].str.replace("fraud_", "")
-sample_df['category'] = sample_df['category'].str.replace("_", " ")
-
-# * Calculating the age of the person at the time of the transaction
-sample_df['age'] = (sample_df['trans_date_trans_time'] - sample_df['dob']).apply(lambda x: x.days // 365)
-
-# * Dropping the dob column
-sample_df = sample_df.drop('dob', axis=1)
-
-# * Modifying the gender column
-sample_df['gender'] = sample_df['gender'].str.replace("M", "Male")
-sample_df['gender'] = sample_df['gender'].str.replace("F", "Female")
-
-# * Amount of transactions in the dataset
-total_transactios = sample_df['trans_num'].count()
-total_transactios_formatted = str(total_transactios)[:3] +"," +str(total_transactios)[3:]
-
-# * The percentage of fraudulent transactions relative to non-fraudulent transactions
-percentage_fraudulent = round((sample_df.query("is_fraud == 1")['is_fraud'].count()) / (sample_df.query("is_fraud == 0")['is_fraud'].count()), 3)
-percentage_fraudulent_formatted = f"{percentage_fraudulent}%"
-
-# * Importing external stylesheets
-dbc_css = "https://cdn.jsdelivr.net/gh/AnnMarieW/dash-bootstrap-templates/dbc.min.css"
-
-# * Nameing the app, using the SLATE style theme, creating a route, and configuring the same server
-app = Dash(__name__, external_stylesheets=[dbc.themes.SLATE, dbc_css], routes_pathname_prefix="/dashboard/", server=server)
-
-# * Configuring the SLATE style theme on the figures
-load_figure_template("SLATE")
-
-# * Define filter labels
-FILTER_LABELS = {
-    1: 'Fraudulent',
-    0: 'Non-Fraudulent',
-    -1: 'All'
-}
-
-
-# * Determining the app_layout
-app.layout = html.Div([
-    html.Header([
-        html.Meta(charSet='UTF-8'),
-        html.Meta(name='viewport', content='width=device-width, initial-scale=1.0'),
-        html.Meta(httpEquiv='X-UA-Compatible', content='ie=edge'),
-        html.Title('Credit Card Fraud Analysis-dashboard'),
-        # Define the CSS links
-        html.Link(rel='preconnect', href='https://fonts.googleapis.com'),
-        html.Link(rel='preconnect', href='https://fonts.gstatic.com', crossOrigin='true'),
-        html.Link(rel='stylesheet', href='/static/styles.css'),  # Replace with the correct path
-    ]),
-    
-    html.Nav(className='navbar navbar-dark bg-dark fixed-top', children=[
-        html.Div(className='container-fluid', children=[
-            html.A('Gal Beeri, Katharine Tamas, Mireille Walton', className='navbar-brand'),
-            html.Button(type='button', style={'font-size': '14px'}, className='navbar-toggler', **{
-                'data-bs-toggle': 'offcanvas',
-                'data-bs-target': '#offcanvasDarkNavbar',
-                'aria-controls': 'offcanvasDarkNavbar',
-                'aria-label': 'Toggle navigation'
-            }, children=[
-                dcc.Link('Home', className='nav-link', href='/', target="_blank"),
-            ]),
-        ]),
-    ]),
-
-    # HERO BANNER
-    html.Div(className='hero_banner', style={'height': '20px'}, children=[
-        html.Img(src='/static/images/homepg_image.jpg', width='100%', height='425px'),
-        html.Div(className='container-fluid', children=[
-            html.Br(),
-            html.Div(className='row', children=[
-                html.Div(className='col-md-2'),
-                html.Div(className='col-md-8', style={'height': '120px', 'margin-bottom': '300px'}, children=[
-                    html.Br(),
-                ]),
-                html.Div(className='col-md-2'),
-            ]),
-        ]),
-    ]),
-                html.Div(children=[
-                    html.Div(className='container-fluid', children=[
-                        html.Div(className='row', style={'margin-top': '280px', 'backgroun-color':'rgba(15, 15, 15, 0.5)'}, children=[
-                            html.Div(className='col-3 mx-auto my-5', children=[
-                            ]),
-                        ]),
-                    ]),
-                ]),
-
-
-    html.Div(
-        style={"width": "80%", "height": "80%", "margin-left": "8%", "margin-right": "8%", "margin-top": "2%"},
-        children=[
-        dbc.Row(html.H2(id="header"), style={"color":"white", "margin-top":"5px", "margin-bottom":"10px", "textAlign": "center"}),
-        dbc.Row(dbc.Card(dbc.RadioItems(
-            id="dataFilter",
-            options= [
-                {'label': 'Fraudulent', 'value': 1},
-                {'label': 'Non-Fraudulent', 'value': 0},
-                {'label': 'All', 'value': -1}],
-                value=0,
-                inline=True
-        ), style={"textAlign":"center", "fontSize": "20px"})),
-    html.Br(),
-    dbc.Row([
-        dbc.Col(dbc.Card(f"Total Transactions: {total_transactios_formatted}"), style={"textAlign":"center",
-                                                                                      "fontSize": "30px",
-                                                                                      "height": "6%"},),
-        dbc.Col(dbc.Card(f"Fraudulent: {percentage_fraudulent_formatted}"), style={"textAlign":"center",
-                                                                                    "fontSize": "30px"}),
-        ]),
-    html.Br(),
-    dbc.Row([
-        dbc.Col(dbc.Card([
-            dcc.Dropdown(
-                id="features",
-                options=sample_df.select_dtypes(include='object').columns[:-1],
-                value= "category",
-                className='dbc'
-            ),
-            dbc.RadioItems(
-                id="asc-desc",
-                options= [
-                    {'label': 'Ascending', 'value': True},
-                    {'label': 'Descending', 'value': False}],
-                value=False,
-                inline=True),
-            dcc.Graph(id="hBarChart"),
-            ]), width=4),
-        dbc.Col(dbc.Card(dcc.Graph(id="histogram")), width=4),
-        dbc.Col(dbc.Card(dcc.Graph(id="pieChart")), width=4)
-        ]),
-    html.Br(),
-    dbc.Row(dbc.Card(dcc.Graph(id="scatterMapBox", style={"width": "100%"})))
-    ]),
-])
-
-# * Configuring the Callback function
-@app.callback(
-    Output("header", "children"),
-    Output("hBarChart", "figure"),
-    Output("histogram", "figure"),
-    Output("pieChart", "figure"),
-    Output("scatterMapBox", "figure"),
-    Input("dataFilter", "value"),
-    Input("features", "value"),
-    Input("asc-desc", "value")
-)
-
-# * Defining the dashboard returned function
-def dashboard(filter_item, feature, sort_order):
-    # * Prevent None values
-    if filter_item is None:
-        raise PreventUpdate()
-    
-    # * Match the filted label to the selected filter item
-    filter_label = FILTER_LABELS.get(filter_item, 'Unknown Filter')
-    
-    # * Create a dynamic header
-    header = f"{filter_label} Dashboard"
-
-    # * Filter the datset based on the selected filter item
-    if filter_item == 1:
-        df = sample_df.query("is_fraud == 1")
-    elif filter_item == 0:
-        df = sample_df.query("is_fraud == 0")
-    else:
-        df = sample_df
-
-    # * Plot the bar chart 
-    bar = (
-        px.bar(
-        df.groupby(feature, as_index=False)["trans_num"].count().sort_values(by="trans_num", ascending=sort_order),
-        x="trans_num",
-        y=feature,
-        color="trans_num",
-        color_continuous_scale="Tealgrn",
-        text_auto='.2s',
-        title=f"Total Transactions by {feature} ({filter_label})"
-        )
-        .update_xaxes(
-        title =f"Total Transactions")
-        .update_layout(
-        title = {
-            'x': 0.12,
-            'y': .85
-        },
-        coloraxis_showscale=False,
-        plot_bgcolor='rgba(15, 15, 15, 0)',
-        paper_bgcolor='rgba(15, 15, 15, 0.5)'
-        )
-    )
-
-    # * Plot the histogram
-    histogram = (
-    px.histogram(
-        df.groupby("age", as_index=False)['trans_num'].count(),
-        x="age",
-        y="trans_num",
-        title=f"Distribution of Transactions by Age ({filter_label})"
-        )
-        .update_traces(marker_color='rgba(49, 252, 3, 0.6)', marker_line_color='#2ad104',
-                       marker_line_width=1.5,
-                       opacity=0.6)
-        .update_layout(
-        title = {
-            "x": 0.075,
-            "y": .85
-        },
-        plot_bgcolor='rgba(15, 15, 15, 0)',
-        paper_bgcolor='rgba(15, 15, 15, 0.5)')
-    )
-
-    # * Plot the pie chart
-    pie = (
-        px.pie(
-        df.groupby("gender", as_index=False)["trans_num"].count(),
-        values="trans_num",
-        names="gender",
-        hole=0.46,
-        color_discrete_sequence=['rgba(252, 3, 3, 0.7)', 'rgba(49, 252, 3, 0.6)'])
-        .update_layout(
-        title_text=f"Transactions Breakdown ({filter_label})",
-        annotations=[dict(text='Gender %',
-                     x=0.5,
-                     y=0.5,
-                     font_size=18,
-                     showarrow=False)],
-        title = {
-            "x": 0.48
-        },
-        plot_bgcolor='rgba(15, 15, 15, 0)',
-        paper_bgcolor='rgba(15, 15, 15, 0.5)')
-    )
-
-    # * Plot the scatter_mapbox
-    map_scatter = (
-        px.scatter_mapbox(
-        df.groupby(["city", "lat", "long"])["trans_num"].count().reset_index(),
-        lat="lat",
-        lon="long",
-        size="trans_num",
-        color="trans_num",
-        color_continuous_scale=px.colors.sequential.Jet,
-        zoom=4.5,
-        center=dict(
-        lat=37.9931,
-        lon=-100.9893
-        ),
-        mapbox_style="carto-darkmatter",
-        title=f"Distribution of Transactions ({filter_label})",
-        hover_data=["city"],
-        hover_name="city",
-        )
-        .update_layout(
-        title={
-            "x":0.038,
-            "y":.85
-        },
-        coloraxis_colorbar = dict(
-        thicknessmode="pixels",
-        thickness=15,
-        title="Count"
-        ),
-        plot_bgcolor='rgba(15, 15, 15, 0)',
-        paper_bgcolor='rgba(15, 15, 15, 0.5)')
-    )
-
-
-    return header, bar, histogram, pie, map_scatter
+# * The dashboard (dashboard_app.py) is built by the first request under /dashboard/, so the
+# * scoring routes start, and keep running, without importing Dash or Plotly. Set
+# * FRAUD_DASHBOARD_WARM_UP=1 to build it on a background thread at startup instead.
+server.config['DASHBOARD_WARM_UP'] = os.environ.get('FRAUD_DASHBOARD_WARM_UP') == '1'
+
+def build_dashboard():
+    from dashboard_app import create_dashboard
+    return create_dashboard(RESULT_STORE.directory)
+
+DASHBOARD = LazyDashboard(server.wsgi_app, build_dashboard)
+server.wsgi_app = DASHBOARD
+
+# * Requests never reach this rule (DASHBOARD takes them first); it keeps url_for('/dashboard/') working in the templates
+server.add_url_rule('/dashboard/', endpoint='/dashboard/', build_only=True)
+if server.config['DASHBOARD_WARM_UP']:
+    DASHBOARD.warm_up()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,107 @@
+# IMPORT DEPENDENCIES
+# ----------------------------------------------------------------
+# * Concurrency and timing libraries
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+################################################################################
+
+
+### BACKGROUND SCORING JOBS ###
+################################################################################
+class JobQueueFull(RuntimeError):
+    """Raised when too many jobs are already waiting to run."""
+
+
+class JobManager:
+    """Runs upload scoring jobs on local thread pools and keeps their progress for /jobs/<id>.
+
+    Large uploads get their own pool of `large_workers` threads, so however many big files
+    are queued the regular pool stays free for everyone else. At most `max_pending` jobs may
+    wait in each pool; finished jobs are forgotten after `retention` seconds. Job state lives in
+    this process only, so clients must poll the worker that accepted the upload.
+    """
+
+    def __init__(self, workers=2, large_workers=1, max_pending=16, retention=3600):
+        self.max_pending = max_pending
+        self.retention = retention
+        self._pools = {
+            False: ThreadPoolExecutor(max_workers=workers, thread_name_prefix='score-job'),
+            True: ThreadPoolExecutor(max_workers=large_workers, thread_name_prefix='score-large-job'),
+        }
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._finished = {}
+
+    def submit(self, run, large=False, key=None, after=None):
+        """Queue `run(update)` and return the new job's state.
+
+        `run` reports progress by calling `update(**fields)` (e.g. progress=0.5, rows=...)
+        and returns the fields describing its result. A job submitted with the `key` of one
+        still queued or running is not queued again: that job is returned, marked 'shared'.
+        `after(result)` is called on the same thread once the job is done (not when it
+        fails), for follow-up work that is not part of the job's time or outcome.
+        """
+        with self._lock:
+            self._prune()
+            for job in self._jobs.values():
+                if key is not None and job['key'] == key and job['state'] in ('queued', 'running'):
+                    return dict(job, shared=True)
+            if sum(job['state'] == 'queued' and job['large'] == large for job in self._jobs.values()) >= self.max_pending:
+                raise JobQueueFull(f"{self.max_pending} {'large ' if large else ''}jobs are already waiting; try again shortly")
+            job = self._new(key, large, state='queued', progress=0.0, started_at=None, finished_at=None)
+
+        self._pools[large].submit(self._run, job['id'], run, after)
+        return job
+
+    def record(self, result, key=None):
+        """Add an already finished job (e.g. a stored result) so it is polled like any other."""
+        with self._lock:
+            self._prune()
+            job = self._new(key, False, **result, state='done', progress=1.0, started_at=_now(), finished_at=_now())
+            self._finished[job['id']] = time.monotonic()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return None if job is None else dict(job)
+
+    def stats(self):
+        with self._lock:
+            states = [job['state'] for job in self._jobs.values()]
+        return {state: states.count(state) for state in ('queued', 'running', 'done', 'failed')}
+
+    def _run(self, job_id, run, after=None):
+        self._update(job_id, state='running', started_at=_now())
+        try:
+            result = run(lambda **fields: self._update(job_id, **fields))
+        except Exception as e:
+            result = None
+            self._update(job_id, state='failed', error=str(e), finished_at=_now())
+        else:
+            self._update(job_id, **result, state='done', progress=1.0, finished_at=_now())
+        with self._lock:
+            self._finished[job_id] = time.monotonic()
+        if after is not None and result is not None:
+            after(result)
+
+    def _new(self, key, large, **fields):
+        job_id = uuid.uuid4().hex
+        self._jobs[job_id] = {'id': job_id, 'key': key, 'large': large, 'submitted_at': _now(), 'error': None, **fields}
+        return dict(self._jobs[job_id])
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.retention
+        for job_id in [job_id for job_id, finished in self._finished.items() if finished < cutoff]:
+            del self._jobs[job_id], self._finished[job_id]
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
@@ -0,0 +1,191 @@
+# IMPORT DEPENDENCIES
+# ----------------------------------------------------------------
+# * Concurrency and timing libraries
+import threading
+import time
+from contextlib import contextmanager
+
+# * Profiling libraries
+import cProfile
+
+# * Peak memory (not available on Windows; stages then report no memory growth)
+try:
+    import resource
+except ImportError:
+    resource = None
+################################################################################
+
+
+### METRICS ###
+################################################################################
+# * Histogram buckets for stage durations (seconds) and scoring rates (rows per second)
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+RATE_BUCKETS = (1e3, 5e3, 1e4, 2.5e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6)
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if value != float('inf') else '+Inf'
+
+
+class Counter:
+    """A total that only goes up, per combination of label values."""
+
+    type = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f'{self.name}{_labels(self.labelnames, key)} {_number(value)}'
+
+
+class Histogram:
+    """Counts of observed values per bucket (cumulative, as Prometheus expects), plus their sum."""
+
+    type = 'histogram'
+
+    def __init__(self, name, help, buckets, labelnames=()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        for key, (counts, total) in sorted(values.items()):
+            for bound, count in zip(self.buckets, counts):
+                yield f'{self.name}_bucket{_labels(self.labelnames, key, [("le", _number(bound))])} {count}'
+            yield f'{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}'
+            yield f'{self.name}_count{_labels(self.labelnames, key)} {counts[-1]}'
+
+
+class Gauge:
+    """A value read when the metrics are scraped: `read()` returns a number or {label values: number}."""
+
+    type = 'gauge'
+
+    def __init__(self, name, help, read, labelnames=(), type='gauge'):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.labelnames = tuple(labelnames)
+        self.type = type
+
+    def samples(self):
+        values = self.read()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in sorted(values.items()):
+            key = key if isinstance(key, tuple) else (key,)
+            yield f'{self.name}{_labels(self.labelnames, key)} {_number(value)}'
+
+
+class MetricsRegistry:
+    """The process's metrics, rendered in the Prometheus text format for /metrics."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+# * Shared by every module of the app; Flask serves it at /metrics
+METRICS = MetricsRegistry()
+
+STAGE_SECONDS = METRICS.register(Histogram(
+    'fraud_stage_duration_seconds', 'Time spent in each scoring and dashboard stage.', DURATION_BUCKETS, ['stage']))
+STAGE_ROWS = METRICS.register(Counter(
+    'fraud_stage_rows_total', 'Rows processed by each stage.', ['stage']))
+STAGE_PEAK_GROWTH = METRICS.register(Counter(
+    'fraud_stage_peak_rss_growth_bytes_total', 'How far each stage raised the process peak resident memory.', ['stage']))
+
+
+def peak_rss_bytes():
+    if resource is None:
+        return 0
+    # * ru_maxrss is in kilobytes on Linux (bytes on macOS, where this overstates it)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+METRICS.register(Gauge('fraud_process_peak_rss_bytes', 'Peak resident memory of this process.', peak_rss_bytes))
+
+
+@contextmanager
+def stage(name, rows=None):
+    """Time the enclosed block as stage `name` (and count `rows` through it)."""
+    peak = peak_rss_bytes()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=name)
+        if rows:
+            STAGE_ROWS.inc(rows, stage=name)
+        growth = peak_rss_bytes() - peak
+        if growth:
+            STAGE_PEAK_GROWTH.inc(growth, stage=name)
+
+
+### PROFILING ###
+################################################################################
+def profile_call(run, dump_path, min_seconds=0.0):
+    """Run `run()` under cProfile and dump the stats to `dump_path` if it took at least `min_seconds`.
+
+    Only the calling thread is profiled. If another profiler is already active (one per
+    process on Python 3.12+), `run()` simply runs unprofiled.
+    """
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        return run()
+
+    start = time.perf_counter()
+    try:
+        return run()
+    finally:
+        profile.disable()
+        if time.perf_counter() - start >= min_seconds:
+            profile.dump_stats(dump_path)
@@ -0,0 +1,147 @@
+# IMPORT DEPENDENCIES
+# ----------------------------------------------------------------
+# * Directory libraries
+from pathlib import Path
+
+# * Persistence libraries
+import hashlib
+import pickle
+
+# * Concurrency and timing libraries
+import threading
+import time
+from datetime import datetime, timezone
+
+# * Preprocessing stages
+from preprocessing import FEATURE_COLUMNS
+################################################################################
+
+
+### MODEL REGISTRY ###
+################################################################################
+# * The decision tree pickled by ML_and_dashboard/ML/ml_model.ipynb
+MODEL_PATH = Path(__file__).resolve().parent / 'model.pkl'
+
+
+class ModelRegistry:
+    """Process-wide holder for the pickled model, shared by every worker thread.
+
+    The model is unpickled once and swapped atomically when the file on disk changes
+    (mtime/size first, then a content hash so touching the file does not reload it).
+    A model whose feature columns do not match the preprocessing output (or that cannot be
+    unpickled) is rejected and the previous model keeps serving; the rejected file's stat
+    and hash are remembered, so it is not loaded again until its content changes.
+    """
+
+    def __init__(self, path=MODEL_PATH, feature_columns=FEATURE_COLUMNS, check_interval=1.0):
+        self.path = Path(path)
+        self.feature_columns = list(feature_columns)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._current = None
+        self._stat = None
+        self._rejected = {'stat': None, 'version': None}
+        self._last_check = 0.0
+        self.load_count = 0
+        self.last_error = None
+        self.reload()
+
+    def get(self):
+        """Return the current model, reloading it first if model.pkl changed on disk."""
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            try:
+                stat = self._file_stat()
+                if stat != self._stat and stat != self._rejected['stat']:
+                    self.reload()
+            except Exception as e:
+                # * Keep serving the last good model
+                self.last_error = str(e)
+        return self._current['model']
+
+    def current(self):
+        """Return (model, version) of the current model, checked against model.pkl like get().
+
+        Both come from one loaded model, so a result can be labelled with the version of the
+        model that scores it even if model.pkl is replaced in between.
+        """
+        self.get()
+        current = self._current
+        return current['model'], current['version']
+
+    def reload(self):
+        """Load model.pkl if its content changed; raises if the new model is invalid."""
+        with self._lock:
+            stat = self._file_stat()
+
+            # * Another thread already picked up this version of the file
+            if self._current is not None and stat == self._stat:
+                return self._current['model']
+
+            data = self.path.read_bytes()
+            version = hashlib.sha256(data).hexdigest()[:12]
+
+            # * Same content (e.g. the file was only touched): keep the loaded model
+            if self._current is not None and self._current['version'] == version:
+                self._stat = stat
+                self.last_error = None
+                return self._current['model']
+
+            # * Content that was already rejected is not unpickled again
+            if version == self._rejected['version']:
+                self._rejected['stat'] = stat
+                raise ValueError(self.last_error)
+
+            try:
+                start = time.perf_counter()
+                model = pickle.loads(data)
+                load_seconds = time.perf_counter() - start
+                self._validate(model)
+            except Exception as e:
+                self._rejected = {'stat': stat, 'version': version}
+                self.last_error = str(e)
+                raise
+
+            # * A single reference assignment swaps the model for every thread at once
+            self._current = {
+                'model': model,
+                'version': version,
+                'load_seconds': load_seconds,
+                'loaded_at': datetime.now(timezone.utc).isoformat(),
+                'derived': {},
+            }
+            self._stat = stat
+            self.load_count += 1
+            self.last_error = None
+            return model
+
+    def derived(self, name, build):
+        """Return `build(model)` for the current model, built once per model version."""
+        self.get()
+        current = self._current
+        if name not in current['derived']:
+            current['derived'][name] = build(current['model'])
+        return current['derived'][name]
+
+    def info(self):
+        current = self._current
+        return {
+            'path': str(self.path),
+            'model': type(current['model']).__name__,
+            'version': current['version'],
+            'loaded_at': current['loaded_at'],
+            'load_seconds': round(current['load_seconds'], 6),
+            'load_count': self.load_count,
+            'feature_columns': self.feature_columns,
+            'last_error': self.last_error,
+        }
+
+    def _validate(self, model):
+        feature_names = getattr(model, 'feature_names_in_', None)
+        if feature_names is None or list(feature_names) != self.feature_columns:
+            raise ValueError(f"{self.path.name} expects features {feature_names}, not {self.feature_columns}")
+
+    def _file_stat(self):
+        stat = self.path.stat()
+        return stat.st_mtime_ns, stat.st_size
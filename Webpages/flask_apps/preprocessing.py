@@ -0,0 +1,226 @@
+# IMPORT DEPENDENCIES
+# ----------------------------------------------------------------
+# * Directory libraries
+from pathlib import Path
+
+# * Analysis and manipulation libraries
+import pandas as pd
+import numpy as np
+
+# * Persistence libraries
+import pickle
+
+# * Stage timings for /metrics
+from metrics import stage
+################################################################################
+
+
+### PREPROCESSING STAGES ###
+################################################################################
+# * Minimum gap between two consecutive transactions that seeds an 'is_fraud' label
+FRAUD_GAP = pd.Timedelta(days=7)
+
+
+def flag_fraud_gaps(fraud_df, column='trans_date_trans_time', gap=FRAUD_GAP):
+    """Seed the 'is_fraud' column from gaps of at least `gap` between consecutive transactions.
+
+    `fraud_df` must already be sorted by `column` and still carry the RangeIndex labels
+    given by `read_csv`. This reproduces the original row loop exactly: the gap is measured
+    between sorted *positions*, but the flag is written to the row whose *label* equals that
+    position, and the row labelled 0 is always flagged.
+    """
+    flags = np.zeros(len(fraud_df), dtype=np.int64)
+
+    if len(flags):
+        # * Set 'is_fraud' to 1 for the first transaction
+        flags[0] = 1
+
+        # * Set 'is_fraud' to 1 for transactions every 7 days (NaT gaps never match)
+        times = fraud_df[column].to_numpy()
+        flags[1:][np.diff(times) >= gap.to_timedelta64()] = 1
+
+    # * Align on labels, not positions, like `fraud_df.loc[i, 'is_fraud'] = 1` did
+    fraud_df['is_fraud'] = pd.Series(flags, index=pd.RangeIndex(len(flags)))
+
+    return fraud_df
+
+
+### GEO FEATURES ###
+################################################################################
+# * Mean Earth radius used by the haversine distance
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, long1, lat2, long2):
+    """Great-circle distance in km between arrays of coordinates given in degrees."""
+    lat1, long1, lat2, long2 = (np.radians(np.asarray(values, dtype=np.float64)) for values in (lat1, long1, lat2, long2))
+    a = np.sin((lat2 - lat1) / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((long2 - long1) / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def merchant_distance_km(fraud_df):
+    """Distance from each cardholder's address to the transaction's merchant."""
+    return haversine_km(fraud_df['lat'], fraud_df['long'], fraud_df['merch_lat'], fraud_df['merch_long'])
+
+
+def prev_merch_distance_km(cards, merch_lat, merch_long):
+    """For transactions sorted by card and time, the distance from each merchant to the card's
+    previous one (NaN for a card's first transaction)."""
+    cards = np.asarray(cards)
+    merch_lat = np.asarray(merch_lat, dtype=np.float64)
+    merch_long = np.asarray(merch_long, dtype=np.float64)
+
+    distances = np.full(len(cards), np.nan)
+    if len(cards) > 1:
+        same_card = cards[1:] == cards[:-1]
+        distances[1:] = np.where(same_card, haversine_km(merch_lat[:-1], merch_long[:-1], merch_lat[1:], merch_long[1:]), np.nan)
+    return distances
+
+
+def geo_features(fraud_df):
+    """Cardholder-to-merchant distance and per-card distance from the previous transaction's merchant.
+
+    Works on a whole batch in one pass (the notebooks' training frames); the first
+    transaction of each card in the batch gets NaN for 'prev_merch_distance_km'. Uploads
+    get the same two features with the previous merchant taken from the card's stored
+    history instead (see feature_store.py). Returns a frame aligned on `fraud_df`'s index.
+    """
+    features = pd.DataFrame(index=fraud_df.index)
+    features['merch_distance_km'] = merchant_distance_km(fraud_df)
+
+    # * Order each card's transactions by time, then compare every merchant with the previous one
+    times = pd.to_datetime(fraud_df['trans_date_trans_time'], format='%Y-%m-%d %H:%M:%S').to_numpy()
+    cards = fraud_df['cc_num'].to_numpy()
+    order = np.lexsort((times, cards))
+    distances = prev_merch_distance_km(cards[order], fraud_df['merch_lat'].to_numpy()[order], fraud_df['merch_long'].to_numpy()[order])
+
+    prev_distances = np.empty(len(order))
+    prev_distances[order] = distances
+    features['prev_merch_distance_km'] = prev_distances
+
+    return features
+
+
+### FITTED PREPROCESSOR ###
+################################################################################
+# * Columns standard-scaled before scoring
+COLUMNS_TO_SCALE = ['trans_date_trans_time', 'amt', 'zip', 'lat', 'long', 'city_pop', 'dob', 'unix_time', 'merch_lat', 'merch_long']
+
+# * Columns replaced by their target encoding (mean 'is_fraud' per value)
+COLUMNS_TO_ENCODE = ['merchant', 'category', 'first', 'last', 'street', 'city', 'state', 'job']
+
+# * Feature columns in the order model.pkl was fitted on
+FEATURE_COLUMNS = [
+    'trans_date_trans_time', 'merchant', 'category', 'amt', 'first', 'last', 'street', 'city', 'state',
+    'zip', 'lat', 'long', 'city_pop', 'job', 'dob', 'unix_time', 'merch_lat', 'merch_long', 'gender'
+]
+
+# * The fitted preprocessor is stored next to model.pkl
+PREPROCESSOR_PATH = Path(__file__).resolve().parent / 'preprocessor.pkl'
+
+
+def to_unix_columns(fraud_df):
+    """Convert the 'trans_date_trans_time' and 'dob' columns to Unix timestamps (seconds)."""
+    fraud_df['trans_date_trans_time'] = pd.to_datetime(fraud_df['trans_date_trans_time'], format='%Y-%m-%d %H:%M:%S')
+    fraud_df['trans_date_trans_time'] = (fraud_df['trans_date_trans_time'] - pd.Timestamp("1970-01-01")) // pd.Timedelta('1s')
+
+    fraud_df['dob'] = pd.to_datetime(fraud_df['dob'], format='%Y-%m-%d')
+    fraud_df['dob'] = (fraud_df['dob'] - pd.Timestamp("1970-01-01")) // pd.Timedelta('1s')
+
+    return fraud_df
+
+
+def seed_fraud_labels(sample_df):
+    """Sort the transactions by time and seed 'is_fraud' from the 7-day gaps, as `upload()` always did."""
+    fraud_df = sample_df.drop(['cc_num', 'trans_num'], axis=1, errors='ignore')
+    fraud_df['trans_date_trans_time'] = pd.to_datetime(fraud_df['trans_date_trans_time'], format='%Y-%m-%d %H:%M:%S')
+    fraud_df = fraud_df.sort_values(by='trans_date_trans_time', ascending=True)
+    fraud_df = flag_fraud_gaps(fraud_df)
+    fraud_df.reset_index(drop=True, inplace=True)
+    return fraud_df
+
+
+def fit_preprocessor(train_df, target='is_fraud'):
+    """Fit the scaler statistics and target-encoding lookup tables on labelled transactions.
+
+    Returns a plain dict so it can be pickled next to model.pkl and applied with
+    `transform_features` without refitting anything per request.
+    """
+    train_df = to_unix_columns(train_df[COLUMNS_TO_SCALE + COLUMNS_TO_ENCODE + [target]].copy())
+
+    # * StandardScaler statistics (population std, zero variance columns are left unscaled)
+    values = train_df[COLUMNS_TO_SCALE].to_numpy(dtype=np.float64)
+    scale = values.std(axis=0)
+    scale[scale == 0.0] = 1.0
+
+    # * Mean 'is_fraud' per value; unseen values fall back to the overall fraud rate
+    encodings = {}
+    for column in COLUMNS_TO_ENCODE:
+        target_mean = train_df.groupby(column)[target].mean()
+        encodings[column] = {
+            'categories': pd.Index(target_mean.index),
+            'values': target_mean.to_numpy(dtype=np.float64),
+        }
+
+    return {
+        'scale_columns': list(COLUMNS_TO_SCALE),
+        'mean': values.mean(axis=0),
+        'scale': scale,
+        'encodings': encodings,
+        'default_encoding': float(train_df[target].mean()),
+        'feature_columns': list(FEATURE_COLUMNS),
+    }
+
+
+def transform_features(sample_df, preprocessor):
+    """Apply a fitted preprocessor to uploaded transactions, keeping their row order.
+
+    Only array arithmetic and hash-table lookups run here, so the cost per row does not
+    depend on what else is in the batch.
+    """
+    with stage('scale', rows=len(sample_df)):
+        fraud_df = to_unix_columns(sample_df[preprocessor['feature_columns']].copy())
+
+        # * Scale the numeric columns with the stored statistics
+        scale_columns = preprocessor['scale_columns']
+        values = fraud_df[scale_columns].to_numpy(dtype=np.float64)
+        fraud_df[scale_columns] = (values - preprocessor['mean']) / preprocessor['scale']
+
+    # * Replace each encoded column with its stored target encoding
+    with stage('encode', rows=len(sample_df)):
+        for column, encoding in preprocessor['encodings'].items():
+            positions = encoding['categories'].get_indexer(fraud_df[column])
+            fraud_df[column] = np.where(positions >= 0, encoding['values'][positions], preprocessor['default_encoding'])
+
+    # * Replace "M" with 1 and "F" with 0 in the "gender" column
+    fraud_df['gender'] = (fraud_df['gender'] == 'M').astype(np.int64)
+
+    return fraud_df
+
+
+def save_preprocessor(preprocessor, path=PREPROCESSOR_PATH):
+    with open(path, 'wb') as file:
+        pickle.dump(preprocessor, file)
+
+
+def load_preprocessor(path=PREPROCESSOR_PATH):
+    """Load the fitted preprocessor, or return None when it has not been fitted yet."""
+    if not Path(path).exists():
+        return None
+    with open(path, 'rb') as file:
+        return pickle.load(file)
+
+
+if __name__ == '__main__':
+    # * Fit the preprocessor offline:  python preprocessing.py Fraud.csv [preprocessor.pkl]
+    import sys
+
+    train_df = pd.read_csv(sys.argv[1])
+
+    # * Training exports carry real labels; plain statement files are seeded like `upload()` does
+    if 'is_fraud' not in train_df.columns:
+        train_df = seed_fraud_labels(train_df)
+
+    output_path = sys.argv[2] if len(sys.argv) > 2 else PREPROCESSOR_PATH
+    save_preprocessor(fit_preprocessor(train_df), output_path)
+    print(f"Saved preprocessor fitted on {len(train_df)} transactions to {output_path}")
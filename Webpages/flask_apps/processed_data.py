@@ -0,0 +1,113 @@
+# IMPORT DEPENDENCIES
+# ----------------------------------------------------------------
+# * Directory libraries
+import os
+import uuid
+from pathlib import Path
+
+# * Analysis and manipulation libraries
+import pandas as pd
+import numpy as np
+
+# * Columnar storage libraries
+import pyarrow as pa
+import pyarrow.parquet as pq
+################################################################################
+
+
+### PROCESSED DATA STORAGE ###
+################################################################################
+# * Every scored upload is one Parquet part in this directory (see result_store.py); the dashboard reads them all
+PROCESSED_DATA_PATH = Path(__file__).resolve().parent / 'processed_data'
+
+# * Low-cardinality string columns, loaded back as pandas categoricals
+CATEGORICAL_COLUMNS = ['merchant', 'category', 'first', 'last', 'gender', 'street', 'city', 'state', 'job']
+
+# * The only columns the dashboard reads
+DASHBOARD_COLUMNS = [
+    'trans_date_trans_time', 'merchant', 'category', 'first', 'last', 'gender', 'street', 'city',
+    'state', 'lat', 'long', 'job', 'dob', 'trans_num', 'is_fraud'
+]
+
+
+def processed_frame(sample_df):
+    """Give scored transactions their storage types: native timestamps and an int8 'is_fraud'."""
+    sample_df['trans_date_trans_time'] = pd.to_datetime(sample_df['trans_date_trans_time'], format='%Y-%m-%d %H:%M:%S')
+    sample_df['dob'] = pd.to_datetime(sample_df['dob'], format='%Y-%m-%d')
+    sample_df['is_fraud'] = sample_df['is_fraud'].astype(np.int8)
+    return sample_df
+
+
+def processed_table(sample_df):
+    # * Strings are stored plain; Parquet dictionary-encodes them and they are read back as
+    # * dictionaries, so chunks with different category sets still share one schema
+    return pa.Table.from_pandas(processed_frame(sample_df), preserve_index=False)
+
+
+def processed_parts(directory=PROCESSED_DATA_PATH):
+    """Completed parts, by name (files still being written end in '.tmp')."""
+    directory = Path(directory)
+    return sorted(directory.glob('*.parquet')) if directory.is_dir() else []
+
+
+def write_processed(sample_df, path):
+    with ProcessedWriter(path) as output:
+        output.write(sample_df)
+
+
+class ProcessedWriter:
+    """Append scored chunks to one Parquet file, one row group per chunk.
+
+    The file is written under a '.tmp' name of its own and renamed on a clean close, so
+    readers in other workers never see a partial part, and two workers writing the same
+    part never write into one file.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._tmp_path = self.path.with_name(f'{self.path.name}.{uuid.uuid4().hex}.tmp')
+        self._writer = None
+
+    def write(self, chunk):
+        table = processed_table(chunk)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self._tmp_path, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+
+    def close(self, discard=False):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            if discard:
+                self._tmp_path.unlink()
+            else:
+                os.replace(self._tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self.close(discard=exc_type is not None)
+
+
+def read_processed(path, columns=None):
+    """Load one processed file, memory-mapped and limited to `columns`.
+
+    String columns come back as categoricals. Older CSV exports are still read, with the
+    same column selection and parsed dates.
+    """
+    path = Path(path)
+    if path.suffix == '.csv':
+        usecols = None if columns is None else lambda column: column in columns
+        dates = [column for column in ('trans_date_trans_time', 'dob') if columns is None or column in columns]
+        return pd.read_csv(path, usecols=usecols, parse_dates=dates)
+
+    names = pq.read_schema(path).names
+    columns = names if columns is None else [column for column in columns if column in names]
+    read_dictionary = [column for column in CATEGORICAL_COLUMNS if column in columns]
+    processed_df = pq.read_table(path, columns=columns, memory_map=True, read_dictionary=read_dictionary).to_pandas()
+
+    # * Dictionaries keep first-seen order; sort the categories so groupbys order values as before
+    for column in read_dictionary:
+        processed_df[column] = processed_df[column].cat.reorder_categories(processed_df[column].cat.categories.sort_values())
+    return processed_df
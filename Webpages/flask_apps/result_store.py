@@ -0,0 +1,151 @@
+# IMPORT DEPENDENCIES
+# ----------------------------------------------------------------
+# * Directory libraries
+import os
+import re
+import uuid
+from pathlib import Path
+
+# * Persistence and timing libraries
+import hashlib
+import time
+
+# * Columnar storage libraries
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# * Processed data storage
+from processed_data import PROCESSED_DATA_PATH, processed_parts
+from transaction_store import STORE_DIRNAME
+################################################################################
+
+
+### SCORED RESULT STORE ###
+################################################################################
+# * '<first 32 hex digits of the upload's sha256>-<8 hex digits identifying the model and preprocessor>'
+RESULT_ID = re.compile(r'^[0-9a-f]{32}-[0-9a-f]{8}$')
+
+# * Bytes read from an upload at a time while it is saved and hashed
+READ_SIZE = 1024 * 1024
+
+# * Uploads and half-written files untouched for this many seconds were left by a crashed job
+LEFTOVER_AGE = 86400
+
+
+def scorer_version(*versions):
+    """Short id for whatever decides the scores (e.g. the model and preprocessor versions)."""
+    return hashlib.sha256(':'.join(map(str, versions)).encode()).hexdigest()[:8]
+
+
+def upload_id(result_id):
+    """The upload part of a result id (its content hash), or None for other names."""
+    return result_id.split('-')[0] if RESULT_ID.match(result_id) else None
+
+
+class ResultStore:
+    """Scored uploads kept as Parquet parts in `directory`, addressed by upload content.
+
+    A result's id is the upload's content hash plus the scorer version, so re-uploading the
+    same file against the same model finds the stored result instead of scoring it again.
+    Every upload is received into its own file under 'incoming/' and every result is
+    written under its own name (renamed into place when complete), so parallel uploads
+    never wait on each other. After each new result the results of the same upload under
+    other scorer versions are removed, so the dashboard counts every upload once, and the
+    oldest results (by last use) are evicted beyond `max_age` seconds, `max_results`
+    results or `max_bytes` bytes; the dashboard's stores of the rows (see
+    transaction_store.py) count towards `max_bytes`, and files a crashed job left behind
+    are removed after LEFTOVER_AGE seconds.
+    """
+
+    def __init__(self, directory=PROCESSED_DATA_PATH, max_results=500, max_bytes=5 * 2**30, max_age=30 * 86400):
+        self.directory = Path(directory)
+        self.incoming = self.directory / 'incoming'
+        self.max_results = max_results
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.incoming.mkdir(parents=True, exist_ok=True)
+
+    def receive(self, stream):
+        """Save an uploaded stream to a file of its own, hashing it on the way; returns (path, sha256)."""
+        digest = hashlib.sha256()
+        path = self.incoming / f'{uuid.uuid4().hex}.csv'
+        with open(path, 'wb') as output:
+            for block in iter(lambda: stream.read(READ_SIZE), b''):
+                digest.update(block)
+                output.write(block)
+        return path, digest.hexdigest()
+
+    def result_id(self, upload_digest, version):
+        return f'{upload_digest[:32]}-{version}'
+
+    def path(self, result_id):
+        """Where the result for `result_id` is (or will be) stored; None for a malformed id."""
+        return self.directory / f'{result_id}.parquet' if RESULT_ID.match(result_id) else None
+
+    def lookup(self, result_id):
+        """The stored result for `result_id`, marked as just used, or None."""
+        path = self.path(result_id)
+        if path is None:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def summary(self, result_id):
+        """Rows and flagged rows of a stored result (reads the is_fraud column only)."""
+        is_fraud = pq.read_table(self.path(result_id), columns=['is_fraud'], memory_map=True)['is_fraud']
+        return {'rows': len(is_fraud), 'flagged': int(pc.sum(pc.equal(is_fraud, 1)).as_py() or 0)}
+
+    def evict(self, keep=()):
+        """Remove superseded, expired and least recently used results over the limits; returns the removed ids.
+
+        A result in `keep` supersedes every other result of the same upload; otherwise the
+        most recently used result of an upload is the one kept.
+        """
+        now = time.time()
+        store_dir = self.directory / STORE_DIRNAME
+        # * Files being received or written are touched as they grow; old ones were left by a crashed job
+        for path in [*self.incoming.iterdir(), *self.directory.glob('*.tmp'), *store_dir.glob('*.tmp')]:
+            try:
+                if now - path.stat().st_mtime > LEFTOVER_AGE:
+                    path.unlink()
+            except FileNotFoundError:
+                continue
+        store_bytes = 0
+        for path in store_dir.glob('*.arrow'):
+            try:
+                store_bytes += path.stat().st_size
+            except FileNotFoundError:
+                continue
+
+        results = []
+        for path in processed_parts(self.directory):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            results.append((stat.st_mtime, stat.st_size, path))
+
+        # * Newest first: the ones at the end are dropped when over a limit
+        results.sort(key=lambda result: result[0], reverse=True)
+        removed = []
+        count = 0
+        total_bytes = store_bytes
+        kept_uploads = {upload_id(result_id) for result_id in keep}
+        seen_uploads = set()
+        for mtime, size, path in results:
+            count += 1
+            total_bytes += size
+            expired = now - mtime > self.max_age
+            over_limit = count > self.max_results or total_bytes > self.max_bytes
+            upload = upload_id(path.stem)
+            superseded = upload is not None and (upload in seen_uploads or upload in kept_uploads)
+            seen_uploads.add(upload)
+            if path.stem not in keep and (superseded or expired or over_limit):
+                path.unlink(missing_ok=True)
+                removed.append(path.stem)
+                count -= 1
+                total_bytes -= size
+        return removed
@@ -0,0 +1,91 @@
+# IMPORT DEPENDENCIES
+# ----------------------------------------------------------------
+# * Analysis and manipulation libraries
+import numpy as np
+
+# * Columnar storage libraries
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# * Partial-sort ranking of fraud probabilities
+from scoring import top_k_risk
+################################################################################
+
+
+### SCORED TRANSACTIONS TABLE ###
+################################################################################
+# * Columns shown in the results table, in display order
+RESULT_COLUMNS = ['trans_date_trans_time', 'cc_num', 'merchant', 'category', 'amt', 'trans_num', 'is_fraud']
+
+# * Rows per page when the request does not say, and the most it may ask for
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# * Transactions in a review queue when the request does not say, and the most it may ask for
+REVIEW_SIZE = 1_000
+MAX_REVIEW_SIZE = 10_000
+
+def result_page(path, page=1, page_size=PAGE_SIZE, sort='is_fraud', ascending=False, is_fraud=None, merchant=None):
+    """Return one page of a stored scored upload, filtered and sorted, as JSON-ready rows.
+
+    Only the table's columns are read (memory-mapped), the is_fraud filter is pushed down
+    to the Parquet reader, and rows are ranked with a partial sort of the first
+    `page * page_size` rows, so only the requested page is ever serialized. Ties keep the
+    upload's row order, so pages do not overlap.
+    """
+    if sort not in RESULT_COLUMNS:
+        raise ValueError(f"Cannot sort by {sort!r}; use one of {', '.join(RESULT_COLUMNS)}")
+    page_size = min(max(int(page_size), 1), MAX_PAGE_SIZE)
+    page = max(int(page), 1)
+
+    filters = None if is_fraud is None else [('is_fraud', '=', int(is_fraud))]
+    table = pq.read_table(path, columns=RESULT_COLUMNS, filters=filters, memory_map=True)
+    if merchant:
+        table = table.filter(pc.match_substring(table['merchant'], merchant, ignore_case=True))
+    total = table.num_rows
+
+    # * Rank only as many rows as this page needs; the row number breaks ties
+    table = table.append_column('row', pa.array(np.arange(total, dtype=np.int64)))
+    sort_keys = [(sort, 'ascending' if ascending else 'descending'), ('row', 'ascending')]
+    end = min(page * page_size, total)
+    ranked = pc.select_k_unstable(table, k=end, sort_keys=sort_keys) if end else pa.array([], pa.uint64())
+    rows = table.take(ranked[(page - 1) * page_size:end])
+
+    return {
+        'total': total,
+        'page': page,
+        'page_size': page_size,
+        'pages': -(-total // page_size),
+        'rows': json_rows(rows.drop(['row'])),
+    }
+
+
+def review_queue(path, k=REVIEW_SIZE):
+    """Return the `k` riskiest transactions of a stored scored upload, highest fraud probability first.
+
+    Only the fraud probabilities are ranked (with a partial sort, see scoring.top_k_risk);
+    the table's other columns are read memory-mapped and only the selected rows are taken
+    from them. Results scored before probabilities were stored cannot be ranked.
+    """
+    k = min(max(int(k), 1), MAX_REVIEW_SIZE)
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    if 'fraud_probability' not in parquet_file.schema_arrow.names:
+        raise ValueError("This result was scored without fraud probabilities; upload the file again to rank it")
+
+    table = parquet_file.read(columns=RESULT_COLUMNS + ['fraud_probability'])
+    ranked = top_k_risk(table['fraud_probability'].to_numpy(), k)
+    return {
+        'total': table.num_rows,
+        'flagged': pc.sum(table['is_fraud']).as_py() or 0,
+        'k': len(ranked),
+        'rows': json_rows(table.take(ranked)),
+    }
+
+
+def json_rows(rows):
+    # * Times go out as the uploaded text; card numbers are longer than JavaScript's exact integers
+    rows = rows.set_column(rows.schema.get_field_index('trans_date_trans_time'), 'trans_date_trans_time',
+                           pc.strftime(rows['trans_date_trans_time'].cast(pa.timestamp('s')), format='%Y-%m-%d %H:%M:%S'))
+    rows = rows.set_column(rows.schema.get_field_index('cc_num'), 'cc_num', rows['cc_num'].cast(pa.string()))
+    return rows.to_pylist()
@@ -0,0 +1,241 @@
+# IMPORT DEPENDENCIES
+# ----------------------------------------------------------------
+# * Directory libraries
+import argparse
+import io
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+# * Concurrency and timing libraries
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# * Analysis and manipulation libraries
+import pandas as pd
+
+# * Columnar storage libraries
+import pyarrow.parquet as pq
+
+# * Preprocessing and scoring stages
+from preprocessing import COLUMNS_TO_ENCODE, COLUMNS_TO_SCALE, fit_preprocessor, load_preprocessor, seed_fraud_labels
+from model_registry import MODEL_PATH, ModelRegistry
+from processed_data import ProcessedWriter
+from scoring import CHUNK_SIZE, score_csv_stream
+################################################################################
+
+
+### PARALLEL BATCH SCORING ###
+################################################################################
+# Offline backfills: score a whole statement export with model.pkl on every core.
+#   python score_batch.py Fraud.csv scored.parquet [--workers 8]
+# The CSV is cut into byte ranges on line boundaries, each worker process streams its range
+# through the same preprocessing and model as /upload and writes its own part, and the parts
+# are then merged in input order into one Parquet (or, for a '.csv' output, CSV) file.
+
+class CsvShard(io.RawIOBase):
+    """The header line followed by bytes [start, end) of a CSV file, as one readable CSV.
+
+    Ranges are cut on newlines, so quoted fields must not contain line breaks (statement
+    exports never do).
+    """
+
+    def __init__(self, path, header, start, end):
+        self._file = open(path, 'rb')
+        self._file.seek(start)
+        self._header = header
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._header:
+            size = min(len(buffer), len(self._header))
+            buffer[:size] = self._header[:size]
+            self._header = self._header[size:]
+            return size
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        size = self._file.readinto(memoryview(buffer)[:size])
+        self._remaining -= size
+        return size
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+class CsvWriter:
+    """Append scored chunks to one CSV file, written under a '.tmp' name like ProcessedWriter.
+
+    Only the first part of a merged output writes the header line (`header=True`), so the
+    parts can be concatenated byte for byte.
+    """
+
+    def __init__(self, path, header=True):
+        self.path = Path(path)
+        self._tmp_path = self.path.with_name(self.path.name + '.tmp')
+        self._file = open(self._tmp_path, 'w', newline='')
+        self._header = header
+
+    def write(self, chunk):
+        chunk.to_csv(self._file, header=self._header, index=False)
+        self._header = False
+
+    def close(self, discard=False):
+        if not self._file.closed:
+            self._file.close()
+            if discard:
+                self._tmp_path.unlink()
+            else:
+                os.replace(self._tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self.close(discard=exc_type is not None)
+
+
+def shard_ranges(path, shards):
+    """Split a CSV into up to `shards` byte ranges of whole lines; returns (header, ranges)."""
+    size = Path(path).stat().st_size
+    with open(path, 'rb') as source:
+        header = source.readline()
+        start = source.tell()
+        bounds = [start]
+        for shard in range(1, shards):
+            # * Move each cut to the end of the line it falls in
+            source.seek(max(start + (size - start) * shard // shards - 1, bounds[-1]))
+            source.readline()
+            bounds.append(min(source.tell(), size))
+    bounds.append(size)
+    return header, [(lo, hi) for lo, hi in zip(bounds, bounds[1:]) if hi > lo]
+
+
+# * Each worker process loads the model and receives the preprocessor once
+_WORKER = {}
+
+
+def _load_worker(model_path, preprocessor):
+    _WORKER['model'] = ModelRegistry(model_path).get()
+    _WORKER['preprocessor'] = preprocessor
+
+
+def score_shard(path, header, start, end, output_path, chunksize=CHUNK_SIZE, threshold=None):
+    """Score one byte range of the input into `output_path` (worker side); returns its summary."""
+    started = time.perf_counter()
+    if Path(output_path).suffix == '.csv':
+        writer = lambda part_path: CsvWriter(part_path, header=start == len(header))
+    else:
+        writer = ProcessedWriter
+    with io.BufferedReader(CsvShard(path, header, start, end)) as source:
+        summary = score_csv_stream(source, output_path, _WORKER['preprocessor'], _WORKER['model'], chunksize=chunksize, writer=writer,
+                                   threshold=threshold)
+    return dict(summary, seconds=time.perf_counter() - started)
+
+
+def merge_parts(parts, output_path):
+    """Join the scored parts, in order, into `output_path` (renamed into place when complete)."""
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(output_path.name + '.tmp')
+    parts = [part for part in parts if part.exists()]
+
+    if output_path.suffix == '.csv':
+        with open(tmp_path, 'wb') as output:
+            for part in parts:
+                with open(part, 'rb') as source:
+                    shutil.copyfileobj(source, output, 16 * 1024 * 1024)
+    else:
+        # * Row groups are copied as they are; only the schema is aligned to the first part's
+        writer = None
+        for part in parts:
+            part_file = pq.ParquetFile(part, memory_map=True)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, part_file.schema_arrow)
+            for row_group in range(part_file.num_row_groups):
+                writer.write_table(part_file.read_row_group(row_group).cast(writer.schema))
+        if writer is None:
+            raise ValueError("No transactions to merge")
+        writer.close()
+    os.replace(tmp_path, output_path)
+
+
+def fit_on_input(path):
+    """Fit a preprocessor on the whole input, seeded from the 7-day gaps as /upload does without preprocessor.pkl."""
+    train_df = pd.read_csv(path, usecols=COLUMNS_TO_SCALE + COLUMNS_TO_ENCODE)
+    return fit_preprocessor(seed_fraud_labels(train_df))
+
+
+def score_batch(input_path, output_path, workers=None, shards=None, preprocessor=None, model_path=MODEL_PATH, chunksize=CHUNK_SIZE,
+                threshold=None):
+    """Score `input_path` on `workers` processes into `output_path`; returns rows, flagged and timings.
+
+    With a `threshold` the output also has each row's 'fraud_probability' and rows are
+    flagged above it; otherwise they are flagged by the model's own predictions.
+    """
+    input_path, output_path = Path(input_path), Path(output_path)
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+
+    # * One fitted preprocessor for every shard, so the scores do not depend on how the file was split
+    if preprocessor is None:
+        preprocessor = fit_on_input(input_path)
+    model_version = ModelRegistry(model_path).info()['version']
+
+    header, ranges = shard_ranges(input_path, shards or workers)
+    parts_dir = Path(tempfile.mkdtemp(prefix=output_path.name + '.parts-', dir=output_path.parent))
+    try:
+        parts = [parts_dir / f'part-{shard:05d}{output_path.suffix}' for shard in range(len(ranges))]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_load_worker, initargs=(model_path, preprocessor)) as pool:
+            futures = [pool.submit(score_shard, input_path, header, start, end, part, chunksize, threshold)
+                       for (start, end), part in zip(ranges, parts)]
+            summaries = [future.result() for future in futures]
+        scored = time.perf_counter()
+
+        merge_parts(parts, output_path)
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    finished = time.perf_counter()
+    rows = sum(summary['rows'] for summary in summaries)
+    return {
+        'rows': rows,
+        'flagged': sum(summary['flagged'] for summary in summaries),
+        'workers': workers,
+        'shards': len(ranges),
+        'model_version': model_version,
+        'seconds': finished - started,
+        'score_seconds': scored - started,
+        'merge_seconds': finished - scored,
+        'rows_per_second': rows / (finished - started),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Score a statement export with model.pkl on several processes.")
+    parser.add_argument('input', help="CSV file with the upload columns")
+    parser.add_argument('output', help="scored output, Parquet (or CSV if it ends in .csv)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument('--shards', type=int, default=None, help="input ranges to split the file into (default: --workers)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_SIZE, help="rows each worker scores at a time")
+    parser.add_argument('--model', default=str(MODEL_PATH), help="pickled model (default: model.pkl)")
+    parser.add_argument('--threshold', type=float, default=None,
+                        help="flag rows whose fraud probability is above this, and write the probabilities (default: model predictions)")
+    parser.add_argument('--preprocessor', default=None,
+                        help="fitted preprocessor (default: preprocessor.pkl, or fit on the input when it does not exist)")
+    args = parser.parse_args()
+
+    preprocessor = load_preprocessor() if args.preprocessor is None else load_preprocessor(args.preprocessor)
+    if preprocessor is None:
+        print("No fitted preprocessor found; fitting one on the input (see preprocessing.py to fit it once)")
+
+    report = score_batch(args.input, args.output, workers=args.workers, shards=args.shards, preprocessor=preprocessor,
+                         model_path=args.model, chunksize=args.chunk_rows, threshold=args.threshold)
+    print(f"Scored {report['rows']:,} transactions ({report['flagged']:,} flagged) with model {report['model_version']} "
+          f"on {report['workers']} workers ({report['shards']} shards)")
+    print(f"{report['seconds']:.2f} s ({report['score_seconds']:.2f} s scoring, {report['merge_seconds']:.2f} s merging): "
+          f"{report['rows_per_second']:,.0f} rows/s")
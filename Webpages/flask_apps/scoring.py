@@ -0,0 +1,113 @@
+# IMPORT DEPENDENCIES
+# ----------------------------------------------------------------
+# * Analysis and manipulation libraries
+import pandas as pd
+import numpy as np
+
+# * Preprocessing stages
+from preprocessing import transform_features
+from processed_data import ProcessedWriter
+
+# * Stage timings for /metrics
+from metrics import stage
+################################################################################
+
+
+### SCORING ###
+################################################################################
+# * Rows read, scored and written at a time by the streaming path
+CHUNK_SIZE = 100_000
+
+# * Transactions whose fraud probability is above this are flagged; 0.5 is what model.predict does
+FRAUD_THRESHOLD = 0.5
+
+
+def predict_fraud(sample_df, preprocessor, model):
+    """Return the model's 0/1 predictions for uploaded transactions, in row order."""
+    features = transform_features(sample_df, preprocessor)
+    with stage('predict', rows=len(features)):
+        return model.predict(features)
+
+
+def predict_fraud_proba(sample_df, preprocessor, model, threshold=FRAUD_THRESHOLD):
+    """Return (0/1 predictions, fraud probabilities) from a single predict_proba pass.
+
+    A transaction is flagged when its fraud probability is above `threshold`; at the
+    default 0.5 the flags are exactly those of `model.predict`.
+    """
+    features = transform_features(sample_df, preprocessor)
+    with stage('predict', rows=len(features)):
+        probabilities = model.predict_proba(features)[:, list(model.classes_).index(1)]
+    return flag_fraud(probabilities, threshold), probabilities
+
+
+def flag_fraud(probabilities, threshold=FRAUD_THRESHOLD):
+    return (np.asarray(probabilities) > threshold).astype(np.int64)
+
+
+def top_k_risk(probabilities, k):
+    """Positions of the `k` highest fraud probabilities, riskiest first; ties keep row order.
+
+    Only a partial sort: np.partition finds the k-th highest probability in linear time,
+    the rows above it and the first rows equal to it are picked in two passes, and just
+    those k rows are sorted. Ranking a million rows for the top thousand copies the
+    probabilities once and sorts a thousand of them.
+    """
+    probabilities = np.asarray(probabilities)
+    k = min(max(int(k), 0), len(probabilities))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    cut = len(probabilities) - k
+    kth = np.partition(probabilities, cut)[cut]
+    above = np.flatnonzero(probabilities > kth)
+    # * Tree models give many rows the same probability; take the earliest of those tied at the cut
+    tied = np.flatnonzero(probabilities == kth)[:k - len(above)]
+    selected = np.concatenate([above, tied])
+    return selected[np.lexsort((selected, -probabilities[selected]))]
+
+
+def format_output(sample_df):
+    """Tidy the merchant and category labels written to the processed data."""
+    sample_df['merchant'] = sample_df['merchant'].str.replace("fraud_", "")
+    sample_df['category'] = sample_df['category'].str.replace("_", " ")
+    sample_df['category'] = sample_df['category'].str.title()
+    return sample_df
+
+
+def score_csv_stream(source, output_path, preprocessor, model, chunksize=CHUNK_SIZE, on_chunk=None, writer=ProcessedWriter,
+                     threshold=None):
+    """Score a CSV chunk by chunk and append each scored chunk to the Parquet file `output_path`.
+
+    Only one chunk is held in memory, so the peak memory follows `chunksize` rather than
+    the size of the upload. `on_chunk` is called with every scored chunk before it is
+    written; `writer(output_path)` opens the output (see score_batch.py for a CSV one).
+    With a `threshold`, each chunk also gets a 'fraud_probability' column and is flagged
+    above it (see predict_fraud_proba); otherwise it is flagged by `model.predict`.
+    Returns the number of rows scored and flagged.
+    """
+    rows = 0
+    flagged = 0
+
+    with writer(output_path) as output:
+        chunks = pd.read_csv(source, chunksize=chunksize)
+        while True:
+            with stage('read_csv'):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+
+            if threshold is None:
+                chunk['is_fraud'] = predict_fraud(chunk, preprocessor, model)
+            else:
+                chunk['is_fraud'], chunk['fraud_probability'] = predict_fraud_proba(chunk, preprocessor, model, threshold)
+            if on_chunk is not None:
+                on_chunk(chunk)
+            with stage('format', rows=len(chunk)):
+                chunk = format_output(chunk)
+            with stage('write', rows=len(chunk)):
+                output.write(chunk)
+
+            rows += len(chunk)
+            flagged += int((chunk['is_fraud'] == 1).sum())
+
+    return {'rows': rows, 'flagged': flagged}
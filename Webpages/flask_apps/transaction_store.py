@@ -0,0 +1,123 @@
+# IMPORT DEPENDENCIES
+# ----------------------------------------------------------------
+# * Directory libraries
+import os
+import uuid
+from pathlib import Path
+
+# * Persistence libraries
+import hashlib
+import json
+
+# * Analysis and manipulation libraries
+import pandas as pd
+import numpy as np
+
+# * Columnar storage libraries
+import pyarrow as pa
+################################################################################
+
+
+### COMPACT TRANSACTION STORE ###
+################################################################################
+# * Bumped whenever the file layout (columns or row order) changes, so older stores are rebuilt rather than misread
+STORE_VERSION = 3
+
+# * Where the stores live, inside the processed data directory
+STORE_DIRNAME = 'dashboard_store'
+
+# * Stored as float32: about a metre of precision, half the memory of float64
+FLOAT32_COLUMNS = ['lat', 'long']
+
+# * Stored as int64 seconds since the epoch
+TIME_COLUMNS = ['trans_date_trans_time']
+
+
+def code_dtype(num_categories):
+    """Smallest signed integer type for codes 0 .. num_categories - 1 (and -1 for missing)."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if num_categories <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def store_path(store_dir, parts):
+    """The store for exactly these processed parts (named after them, so every worker agrees on it)."""
+    key = '\n'.join([str(STORE_VERSION)] + [Path(part).name for part in parts])
+    return Path(store_dir) / f'{hashlib.sha256(key.encode()).hexdigest()[:24]}.arrow'
+
+
+def store_table(sample_df):
+    """Turn dashboard rows into compact Arrow columns.
+
+    Categoricals become plain integer codes with their categories kept once in the field
+    metadata; coordinates become float32 and timestamps int64 epoch seconds. Other string
+    columns (e.g. trans_num) stay Arrow strings, so reading them back creates no Python objects.
+    """
+    fields, arrays = [], []
+    for name, values in sample_df.items():
+        metadata = None
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            categories = values.cat.categories
+            metadata = {'categories': json.dumps([str(category) for category in categories])}
+            array = pa.array(values.cat.codes.to_numpy().astype(code_dtype(len(categories))))
+        elif name in TIME_COLUMNS:
+            metadata = {'unit': 's'}
+            array = pa.array(values.to_numpy(dtype='datetime64[s]').view(np.int64))
+        elif name in FLOAT32_COLUMNS:
+            array = pa.array(values.to_numpy(dtype=np.float32))
+        elif name == 'age' and not values.isna().any():
+            array = pa.array(values.to_numpy().astype(np.int16))
+        else:
+            array = pa.array(values, from_pandas=True)
+        fields.append(pa.field(name, array.type, metadata=metadata))
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+def write_store(sample_df, path):
+    """Write dashboard rows to an uncompressed Arrow IPC file, renamed into place when complete."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = store_table(sample_df)
+    tmp_path = path.with_name(f'{path.name}.{uuid.uuid4().hex}.tmp')
+    with pa.OSFile(str(tmp_path), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_store(path):
+    """Dashboard rows backed by the memory-mapped store at `path`.
+
+    Codes, coordinates, times and strings are views of the file, so every process that
+    opens the same store shares one copy of it through the page cache; only the (small)
+    category lists are built per process. The columns are read-only.
+    """
+    table = pa.ipc.open_file(pa.memory_map(str(path), 'r')).read_all()
+    columns = {}
+    for field, column in zip(table.schema, table.columns):
+        array = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+        metadata = field.metadata or {}
+        if b'categories' in metadata:
+            columns[field.name] = pd.Categorical.from_codes(array.to_numpy(), categories=json.loads(metadata[b'categories']))
+        elif b'unit' in metadata:
+            columns[field.name] = array.to_numpy().view(f"datetime64[{metadata[b'unit'].decode()}]")
+        elif pa.types.is_string(array.type) or pa.types.is_large_string(array.type):
+            columns[field.name] = pd.arrays.ArrowExtensionArray(array)
+        else:
+            columns[field.name] = array.to_numpy(zero_copy_only=False)
+    # * copy=False keeps every column as its own block instead of consolidating (copying) them
+    return pd.DataFrame(columns, copy=False)
+
+
+def prune_stores(store_dir, keep):
+    """Delete stores other than `keep`; processes still mapping one keep their view of it."""
+    for path in Path(store_dir).glob('*.arrow'):
+        if path != Path(keep):
+            try:
+                path.unlink()
+            except OSError:
+                # * Windows refuses to delete a file that another process has mapped
+                pass
@@ -0,0 +1,103 @@
+# IMPORT DEPENDENCIES
+# ----------------------------------------------------------------
+# * Analysis and manipulation libraries
+import numpy as np
+from array import array
+from datetime import datetime, timedelta
+
+# * Preprocessing stages
+from preprocessing import FEATURE_COLUMNS
+################################################################################
+
+
+### SINGLE TRANSACTION SCORING ###
+################################################################################
+EPOCH = datetime(1970, 1, 1)
+ONE_SECOND = timedelta(seconds=1)
+
+
+def compile_tree(model):
+    """Generate a plain Python function from a fitted DecisionTreeClassifier.
+
+    The returned function takes the 19 feature values (in FEATURE_COLUMNS order) as a
+    list and returns (prediction, fraud probability) after at most `max_depth` comparisons,
+    without NumPy or sklearn on the call path. Like sklearn, values are compared as float32.
+    """
+    tree = model.tree_
+    classes = list(model.classes_)
+    fraud_class = classes.index(1)
+
+    # * predict_proba normalizes the (class weighted) counts stored in each leaf
+    values = tree.value[:, 0, :]
+    probabilities = values / values.sum(axis=1, keepdims=True)
+
+    lines = ["def evaluate(x):"]
+
+    def emit(node, depth):
+        indent = "    " * depth
+        left, right = tree.children_left[node], tree.children_right[node]
+        if left == right:
+            prediction = classes[int(np.argmax(probabilities[node]))]
+            lines.append(f"{indent}return ({int(prediction)}, {float(probabilities[node, fraud_class])!r})")
+            return
+        lines.append(f"{indent}if x[{int(tree.feature[node])}] <= {float(tree.threshold[node])!r}:")
+        emit(left, depth + 1)
+        lines.append(f"{indent}else:")
+        emit(right, depth + 1)
+
+    emit(0, 1)
+    namespace = {}
+    exec(compile("\n".join(lines), f"<compiled {type(model).__name__}>", "exec"), namespace)
+    evaluate = namespace['evaluate']
+
+    def score(features):
+        # * Round to float32 exactly as sklearn does before walking the tree
+        return evaluate(array('f', features).tolist())
+
+    return score
+
+
+def record_preprocessor(preprocessor):
+    """Build a function applying a fitted preprocessor to one transaction given as a dict.
+
+    Returns the feature values in FEATURE_COLUMNS order, matching `transform_features`.
+    """
+    scaling = {
+        column: (float(mean), float(scale))
+        for column, mean, scale in zip(preprocessor['scale_columns'], preprocessor['mean'], preprocessor['scale'])
+    }
+    encodings = {
+        column: dict(zip(encoding['categories'], encoding['values'].tolist()))
+        for column, encoding in preprocessor['encodings'].items()
+    }
+    default_encoding = preprocessor['default_encoding']
+    columns = preprocessor['feature_columns']
+
+    def transform(record):
+        values = dict(record)
+        values['trans_date_trans_time'] = (datetime.strptime(values['trans_date_trans_time'], '%Y-%m-%d %H:%M:%S') - EPOCH) // ONE_SECOND
+        values['dob'] = (datetime.strptime(values['dob'], '%Y-%m-%d') - EPOCH) // ONE_SECOND
+
+        features = []
+        for column in columns:
+            value = values[column]
+            if column in scaling:
+                mean, scale = scaling[column]
+                value = (value - mean) / scale
+            elif column in encodings:
+                value = encodings[column].get(value, default_encoding)
+            elif column == 'gender':
+                value = 1 if value == 'M' else 0
+            features.append(value)
+        return features
+
+    return transform
+
+
+def record_scorer(model, preprocessor):
+    """Combine the dict preprocessing and the compiled tree: record -> (prediction, probability)."""
+    if list(preprocessor['feature_columns']) != list(FEATURE_COLUMNS):
+        raise ValueError("The preprocessor and the compiled tree disagree on the feature columns")
+    transform = record_preprocessor(preprocessor)
+    score = compile_tree(model)
+    return lambda record: score(transform(record))